@@ -0,0 +1,224 @@
+"""Streaming anomaly detection over per-category spending.
+
+Each category keeps exponentially weighted (EWMA/EWMVar) statistics of two
+streams: individual expense amounts, and weekly spending totals. A new
+expense is scored against the statistics from before it, and updating them
+is O(1), so AnomalyDetector.add runs on every insert without looking at
+history. Two things are flagged:
+
+- an unusual transaction: an amount more than THRESHOLD spreads above its
+  category's running mean
+- a category spike: a week's running total crossing THRESHOLD spreads above
+  the category's weekly mean, flagged once per category and week
+
+Weeks with no spending count as zero-total weeks, at most MAX_GAP_WEEKS of
+them in a row. from_transactions
+backfills the same model over a whole ledger with pandas' grouped EWM
+instead of a Python loop. Only spending (positive amounts) is modelled.
+Deleting a transaction drops its flags but does not rewind the statistics.
+"""
+from collections import deque
+from dataclasses import dataclass
+from math import sqrt
+
+from budget_periods import MINUTES_PER_DAY, week_ordinal
+
+TRANSACTION = "transaction"
+SPIKE = "spike"
+
+# Weight of the newest observation; ~1 / the number of observations remembered
+AMOUNT_ALPHA = 0.1
+WEEK_ALPHA = 0.3
+# Spreads (standard deviations) above the mean before something is flagged
+THRESHOLD = 3.0
+# Observations needed before a category's statistics are trusted
+AMOUNT_WARMUP = 5
+WEEK_WARMUP = 4
+# Floor on the spread, so a category of identical amounts doesn't flag a cent's difference
+MIN_SPREAD_CENTS = 500
+# Empty weeks folded in at most; after this the weekly mean has decayed to ~0 anyway
+MAX_GAP_WEEKS = 52
+FLAG_HISTORY = 200
+
+
+@dataclass(slots=True)
+class AnomalyFlag:
+    """An unusual transaction, or a category whose week is running unusually high"""
+    kind: str
+    category_code: int
+    timestamp: int
+    # The transaction's amount, or the week's total when the spike was flagged
+    amount_cents: int
+    expected_cents: int
+    score: float
+    transaction: object = None
+
+
+class _EwmStats:
+    """Exponentially weighted mean and variance of one stream"""
+    __slots__ = ('count', 'mean', 'var')
+
+    def __init__(self, count=0, mean=0.0, var=0.0):
+        self.count = count
+        self.mean = mean
+        self.var = var
+
+    def update(self, value, alpha):
+        if self.count == 0:
+            self.mean, self.var = float(value), 0.0
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+
+    def score(self, value):
+        """Spreads above the mean"""
+        return (value - self.mean) / max(sqrt(self.var), MIN_SPREAD_CENTS)
+
+
+class _WeekState:
+    """A category's current week and the statistics of its completed weeks"""
+    __slots__ = ('week', 'total', 'flagged', 'stats')
+
+    def __init__(self, week, total=0, flagged=False, stats=None):
+        self.week = week
+        self.total = total
+        self.flagged = flagged
+        self.stats = stats or _EwmStats()
+
+
+class AnomalyDetector:
+    """Per-category amount and weekly-total models, plus the most recent flags"""
+    __slots__ = ('transactions', '_amounts', '_weeks', 'flags')
+
+    def __init__(self, transactions):
+        # Same list as st.session_state.expenses, kept to detect when it is replaced
+        self.transactions = transactions
+        self._amounts = {}
+        self._weeks = {}
+        self.flags = deque(maxlen=FLAG_HISTORY)
+
+    def add(self, transaction):
+        """Score and learn from a new transaction, returning any flags it raised"""
+        amount = transaction.amount_cents
+        if amount <= 0:
+            return []
+
+        code = transaction.category_code
+        raised = []
+        stats = self._amounts.get(code)
+        if stats is None:
+            stats = self._amounts[code] = _EwmStats()
+        if stats.count >= AMOUNT_WARMUP:
+            score = stats.score(amount)
+            if score > THRESHOLD:
+                raised.append(AnomalyFlag(TRANSACTION, code, transaction.timestamp, amount,
+                                          round(stats.mean), score, transaction))
+        stats.update(amount, AMOUNT_ALPHA)
+
+        week = week_ordinal(transaction.timestamp // MINUTES_PER_DAY)
+        state = self._weeks.get(code)
+        if state is None:
+            state = self._weeks[code] = _WeekState(week)
+        elif week > state.week:
+            # Close the finished week, then any empty weeks since
+            state.stats.update(state.total, WEEK_ALPHA)
+            for _ in range(min(week - state.week - 1, MAX_GAP_WEEKS)):
+                state.stats.update(0, WEEK_ALPHA)
+            state.week, state.total, state.flagged = week, 0, False
+        if week == state.week:
+            # A back-dated expense in an already closed week only feeds the amount model
+            state.total += amount
+            if not state.flagged and state.stats.count >= WEEK_WARMUP:
+                score = state.stats.score(state.total)
+                if score > THRESHOLD:
+                    state.flagged = True
+                    raised.append(AnomalyFlag(SPIKE, code, transaction.timestamp, state.total,
+                                              round(state.stats.mean), score))
+
+        self.flags.extend(raised)
+        return raised
+
+    def remove(self, transaction):
+        """Drop the flags raised by a deleted transaction"""
+        kept = [flag for flag in self.flags if flag.transaction is not transaction]
+        if len(kept) != len(self.flags):
+            self.flags = deque(kept, maxlen=FLAG_HISTORY)
+
+    def recent_flags(self, kind=None):
+        """Flags, newest first, optionally of one kind"""
+        return [flag for flag in reversed(self.flags) if kind is None or flag.kind == kind]
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """Backfill a detector over a timestamp-ordered ledger, vectorized per category"""
+        import numpy as np
+        import pandas as pd
+
+        detector = cls(transactions)
+        count = len(transactions)
+        timestamps = np.fromiter((transaction.timestamp for transaction in transactions), dtype=np.int64, count=count)
+        codes = np.fromiter((transaction.category_code for transaction in transactions), dtype=np.int64, count=count)
+        amounts = np.fromiter((transaction.amount_cents for transaction in transactions), dtype=np.int64, count=count)
+        rows = np.flatnonzero(amounts > 0)
+        if not len(rows):
+            return detector
+
+        frame = pd.DataFrame({
+            'row': rows,
+            'code': codes[rows],
+            'week': week_ordinal(timestamps[rows] // MINUTES_PER_DAY),
+            'amount': amounts[rows].astype(float),
+        })
+        flags = []
+
+        # Amount model: each row is scored against its category's statistics before it
+        by_code = frame.groupby('code', sort=False)
+        ewm = by_code['amount'].ewm(alpha=AMOUNT_ALPHA, adjust=False)
+        frame['mean'] = ewm.mean().droplevel(0)
+        frame['var'] = ewm.var(bias=True).droplevel(0).fillna(0.0)
+        previous = frame.groupby('code', sort=False)[['mean', 'var']].shift(1)
+        scores = (frame['amount'] - previous['mean']) / np.maximum(np.sqrt(previous['var']), MIN_SPREAD_CENTS)
+        unusual = ((by_code.cumcount() >= AMOUNT_WARMUP) & (scores > THRESHOLD)).to_numpy()
+        for row, code, amount, expected, score in zip(frame['row'][unusual], frame['code'][unusual],
+                                                      frame['amount'][unusual], previous['mean'][unusual],
+                                                      scores[unusual]):
+            flags.append(AnomalyFlag(TRANSACTION, int(code), int(timestamps[row]), int(amount),
+                                     round(expected), float(score), transactions[row]))
+        final = frame.groupby('code', sort=False).agg(count=('amount', 'size'), mean=('mean', 'last'), var=('var', 'last'))
+        for code, total, mean, var in final.itertuples():
+            detector._amounts[int(code)] = _EwmStats(int(total), float(mean), float(var))
+
+        # Weekly model: dense weekly totals per category, empty weeks included
+        # (a longer gap is shortened to MAX_GAP_WEEKS, as add() does)
+        frame['week_total'] = frame.groupby(['code', 'week'], sort=False)['amount'].cumsum()
+        for code, group in frame.groupby('code', sort=False):
+            weeks = group['week'].to_numpy()
+            offsets = np.concatenate([[0], np.cumsum(np.minimum(np.diff(weeks), MAX_GAP_WEEKS + 1))])
+            totals = np.bincount(offsets, weights=group['amount'])
+            # Statistics in force during week k come from weeks 0..k-1
+            ewm = pd.Series(totals[:-1]).ewm(alpha=WEEK_ALPHA, adjust=False)
+            means = np.concatenate([[0.0], ewm.mean().to_numpy()])
+            variances = np.concatenate([[0.0], ewm.var(bias=True).fillna(0.0).to_numpy()])
+
+            # A week is flagged on the row whose running total first crosses its threshold
+            running = group['week_total'].to_numpy()
+            scores = (running - means[offsets]) / np.maximum(np.sqrt(variances[offsets]), MIN_SPREAD_CENTS)
+            crossed = (offsets >= WEEK_WARMUP) & (scores > THRESHOLD)
+            first_crossing = crossed & (pd.Series(crossed).groupby(offsets).cumsum().to_numpy() == 1)
+            for position in np.flatnonzero(first_crossing):
+                row = group['row'].iloc[position]
+                flags.append(AnomalyFlag(SPIKE, int(code), int(timestamps[row]), int(running[position]),
+                                         round(means[offsets[position]]), float(scores[position])))
+
+            current = len(totals) - 1
+            detector._weeks[int(code)] = _WeekState(
+                int(weeks[-1]), int(totals[current]), bool(crossed[offsets == current].any()),
+                _EwmStats(current, float(means[current]), float(variances[current])),
+            )
+
+        flags.sort(key=lambda flag: flag.timestamp)
+        detector.flags.extend(flags)
+        return detector
@@ -0,0 +1,179 @@
+"""Account balance derived from an opening balance and the transaction list.
+
+The balance is never stored on its own: it is the opening balance minus the
+sum of every transaction's amount_cents (spending is positive, income
+negative). Transactions are kept in timestamp order and every
+CHECKPOINT_INTERVAL rows the running total is checkpointed, so the balance as
+of any moment is a binary search over the checkpoints plus a scan of at most
+one interval of rows. Whole balance histories for charts are computed with
+a numpy cumulative sum instead (balance_series).
+
+The same ordering makes every date-range query a binary-search slice
+(between, days_between). Budget months and pay periods never decrease as
+timestamps grow, so a run of either is a contiguous slice too
+(in_budget_months, in_pay_periods).
+"""
+from bisect import bisect_left, bisect_right
+from itertools import count
+from operator import attrgetter
+
+from budget_periods import MINUTES_PER_DAY
+
+CHECKPOINT_INTERVAL = 128
+
+_timestamp = attrgetter('timestamp')
+_budget_month = attrgetter('budget_month')
+_pay_period = attrgetter('pay_period')
+# Shared across ledgers so a replaced ledger never reuses an old version
+_versions = count(1)
+
+
+def timestamp_bounds(transactions, start_timestamp=None, end_timestamp=None):
+    """(lo, hi) such that transactions[lo:hi] fall within the inclusive timestamp range
+
+    transactions must be in timestamp order; a None bound is open.
+    """
+    lo = 0 if start_timestamp is None else bisect_left(transactions, start_timestamp, key=_timestamp)
+    hi = len(transactions) if end_timestamp is None else bisect_right(transactions, end_timestamp, lo=lo, key=_timestamp)
+    return lo, hi
+
+
+class BalanceLedger:
+    """Running balance over a timestamp-ordered list of transactions"""
+    __slots__ = ('opening_cents', 'transactions', 'total_cents', 'version', '_checkpoint_times', '_checkpoint_totals')
+
+    def __init__(self, opening_cents, transactions):
+        self.opening_cents = opening_cents
+        # The list is shared with the caller (st.session_state.expenses), not copied
+        self.transactions = transactions
+        if any(earlier.timestamp > later.timestamp for earlier, later in zip(transactions, transactions[1:])):
+            transactions.sort(key=_timestamp)
+        self.total_cents = 0
+        self._checkpoint_times = []
+        self._checkpoint_totals = []
+        self._rebuild_from(0)
+
+    @classmethod
+    def from_closing_balance(cls, closing_cents, transactions):
+        """Ledger whose transactions end at closing_cents (e.g. an older export)"""
+        return cls(closing_cents + sum(transaction.amount_cents for transaction in transactions), transactions)
+
+    @property
+    def balance_cents(self):
+        """Balance after every transaction"""
+        return self.opening_cents - self.total_cents
+
+    def _rebuild_from(self, index):
+        """Recompute the checkpoints and total for rows from index onwards"""
+        block = min(index // CHECKPOINT_INTERVAL, len(self._checkpoint_totals))
+        del self._checkpoint_times[block:]
+        del self._checkpoint_totals[block:]
+
+        start = block * CHECKPOINT_INTERVAL
+        running = 0
+        if block:
+            previous_start = start - CHECKPOINT_INTERVAL
+            running = self._checkpoint_totals[-1] + sum(
+                transaction.amount_cents for transaction in self.transactions[previous_start:start]
+            )
+
+        for position in range(start, len(self.transactions)):
+            transaction = self.transactions[position]
+            if position % CHECKPOINT_INTERVAL == 0:
+                self._checkpoint_times.append(transaction.timestamp)
+                self._checkpoint_totals.append(running)
+            running += transaction.amount_cents
+        self.total_cents = running
+        self.version = next(_versions)
+
+    def append(self, transaction):
+        """Add a transaction, keeping timestamp order"""
+        transactions = self.transactions
+        if transactions and transaction.timestamp < transactions[-1].timestamp:
+            index = bisect_right(transactions, transaction.timestamp, key=_timestamp)
+            transactions.insert(index, transaction)
+            self._rebuild_from(index)
+            return
+
+        if len(transactions) % CHECKPOINT_INTERVAL == 0:
+            self._checkpoint_times.append(transaction.timestamp)
+            self._checkpoint_totals.append(self.total_cents)
+        transactions.append(transaction)
+        self.total_cents += transaction.amount_cents
+        self.version = next(_versions)
+
+    def pop(self, index):
+        """Remove and return the transaction at index"""
+        transaction = self.transactions.pop(index)
+        self._rebuild_from(index)
+        return transaction
+
+    def index_of(self, transaction):
+        """Position of this transaction object (not merely an equal one), found by its timestamp"""
+        lo, hi = timestamp_bounds(self.transactions, transaction.timestamp, transaction.timestamp)
+        for index in range(lo, hi):
+            if self.transactions[index] is transaction:
+                return index
+        raise ValueError("Transaction is not in the ledger")
+
+    def between(self, start_timestamp=None, end_timestamp=None):
+        """Transactions with start_timestamp <= timestamp <= end_timestamp, oldest first"""
+        lo, hi = timestamp_bounds(self.transactions, start_timestamp, end_timestamp)
+        return self.transactions[lo:hi]
+
+    def days_between(self, first_day, last_day):
+        """Transactions dated first_day through last_day (day ordinals, inclusive)"""
+        return self.between(first_day * MINUTES_PER_DAY, (last_day + 1) * MINUTES_PER_DAY - 1)
+
+    def _stamped_between(self, key, first, last):
+        """Transactions whose stamped period ordinal key() is from first through last"""
+        lo = bisect_left(self.transactions, first, key=key)
+        hi = bisect_right(self.transactions, last, lo=lo, key=key)
+        return self.transactions[lo:hi]
+
+    def in_budget_months(self, first_month, last_month):
+        """Transactions stamped with a budget month from first_month through last_month"""
+        return self._stamped_between(_budget_month, first_month, last_month)
+
+    def in_pay_periods(self, first_period, last_period):
+        """Transactions stamped with a pay period from first_period through last_period"""
+        return self._stamped_between(_pay_period, first_period, last_period)
+
+    def budget_months(self):
+        """Distinct budget months with transactions, oldest first, one bisect per month"""
+        months = []
+        position = 0
+        while position < len(self.transactions):
+            month = self.transactions[position].budget_month
+            months.append(month)
+            position = bisect_right(self.transactions, month, lo=position, key=_budget_month)
+        return months
+
+    def balance_at(self, timestamp):
+        """Balance after every transaction up to and including timestamp"""
+        block = bisect_right(self._checkpoint_times, timestamp) - 1
+        if block < 0:
+            return self.opening_cents
+
+        running = self._checkpoint_totals[block]
+        start = block * CHECKPOINT_INTERVAL
+        for transaction in self.transactions[start:start + CHECKPOINT_INTERVAL]:
+            if transaction.timestamp > timestamp:
+                break
+            running += transaction.amount_cents
+        return self.opening_cents - running
+
+    def balance_series(self, first_day, last_day, step_days=1):
+        """End-of-day balances (cents) on first_day, first_day + step_days, ... up to last_day"""
+        import numpy as np
+
+        count = len(self.transactions)
+        days = np.fromiter((transaction.timestamp for transaction in self.transactions),
+                           dtype=np.int64, count=count) // MINUTES_PER_DAY
+        spent = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.fromiter((transaction.amount_cents for transaction in self.transactions),
+                              dtype=np.int64, count=count), out=spent[1:])
+
+        grid = np.arange(first_day, last_day + 1, step_days, dtype=np.int64)
+        # Rows are in timestamp order, so the rows on or before each day are a prefix
+        return grid, self.opening_cents - spent[np.searchsorted(days, grid, side='right')]
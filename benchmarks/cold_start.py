@@ -0,0 +1,62 @@
+"""Measure cold-start time to first paint of the welcome screen.
+
+Usage: python benchmarks/cold_start.py [--budget-ms 1500]
+
+Run in a fresh interpreter so nothing is already imported. Prints one JSON
+object with the Streamlit import time, the first script run (what a new
+session waits for before the welcome screen paints), the heavy modules the
+app itself pulled in during that run, and whether the total fits the budget.
+"""
+import time
+
+_PROCESS_START = time.perf_counter()
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = ROOT / "budget_tracker_claude_weeklyvelocity.py"
+
+# Time from interpreter start to the welcome screen's first paint
+COLD_START_BUDGET_MS = 1500
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "altair"]
+
+
+def measure(budget_ms=COLD_START_BUDGET_MS):
+    """Time importing Streamlit and the app's first (welcome screen) run"""
+    sys.path.insert(0, str(ROOT))
+    import_start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_ready = time.perf_counter()
+
+    already_loaded = {name for name in HEAVY_MODULES if name in sys.modules}
+    at = AppTest.from_file(str(APP_PATH), default_timeout=60)
+    run_start = time.perf_counter()
+    at.run()
+    painted = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    total_ms = (painted - _PROCESS_START) * 1000
+    return {
+        'interpreter_to_import_ms': round((import_start - _PROCESS_START) * 1000, 3),
+        'streamlit_import_ms': round((streamlit_ready - import_start) * 1000, 3),
+        'first_paint_run_ms': round((painted - run_start) * 1000, 3),
+        'total_ms': round(total_ms, 3),
+        'heavy_modules_loaded_by_streamlit': sorted(already_loaded),
+        'heavy_modules_loaded_by_app': sorted(
+            name for name in HEAVY_MODULES if name in sys.modules and name not in already_loaded
+        ),
+        'budget_ms': budget_ms,
+        'within_budget': total_ms <= budget_ms,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    result = measure(parser.parse_args().budget_ms)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['within_budget'] else 1)
@@ -0,0 +1,90 @@
+"""Compare the memory held by dict rows and slotted ledger records.
+
+Usage: python benchmarks/record_memory.py --rows 100000
+
+Builds the same synthetic rows twice, once in the old dict layout (date string
+plus the derived day and budget month) and once as Expense records with category codes, and
+reports the bytes tracemalloc attributes to each as one JSON object.
+"""
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from budget_periods import budget_month_ordinal, day_ordinal  # noqa: E402
+from categories import CategoryDictionary  # noqa: E402
+from money import to_cents  # noqa: E402
+from records import Expense  # noqa: E402
+
+CATEGORIES = ['Groceries', 'Rent', 'Transport', 'Dining', 'Utilities', 'Entertainment', 'Health', 'Shopping']
+
+
+def synthetic_fields(rows, seed=0):
+    """Field tuples as they come out of a CSV import (fresh strings per row)"""
+    rnd = random.Random(seed)
+    fields = []
+    for i in range(rows):
+        date_text = f"{2020 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d} {8 + i % 12:02d}:{i % 60:02d}"
+        # Copy the strings so every row owns them, like parsed CSV cells do
+        category = ''.join(rnd.choice(CATEGORIES))
+        fields.append((date_text, category, round(rnd.uniform(1, 200), 2), f"purchase {i}", ''.join('Monthly')))
+    return fields
+
+
+def build_dicts(fields):
+    rows = []
+    for date_text, category, amount, description, frequency in fields:
+        day = day_ordinal(date_text)
+        rows.append({
+            'date': date_text,
+            'category': category,
+            'amount': amount,
+            'description': description,
+            'frequency': frequency,
+            'day': day,
+            'budget_month': budget_month_ordinal(day),
+        })
+    return rows
+
+
+def build_records(fields):
+    categories = CategoryDictionary(CATEGORIES)
+    rows = []
+    for date_text, category, amount, description, frequency in fields:
+        record = Expense.from_date(date_text, categories.code(category), to_cents(amount), description, frequency)
+        record.budget_month = budget_month_ordinal(record.day)
+        rows.append(record)
+    return rows
+
+
+def measure(builder, fields):
+    """Bytes still allocated by the rows builder returns"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    rows = builder(fields)
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del rows
+    return allocated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dict_bytes = measure(build_dicts, synthetic_fields(args.rows, args.seed))
+    record_bytes = measure(build_records, synthetic_fields(args.rows, args.seed))
+    print(json.dumps({
+        'rows': args.rows,
+        'dict_bytes': dict_bytes,
+        'record_bytes': record_bytes,
+        'dict_bytes_per_row': round(dict_bytes / args.rows, 1),
+        'record_bytes_per_row': round(record_bytes / args.rows, 1),
+        'reduction': round(1 - record_bytes / dict_bytes, 3),
+    }, indent=2))
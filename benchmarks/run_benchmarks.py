@@ -0,0 +1,203 @@
+"""Time the dashboard hot paths against a synthetic ledger and emit JSON.
+
+Usage: python benchmarks/run_benchmarks.py --years 3 --per-day 8 --output bench.json
+
+Each helper runs inside a real Streamlit script run (via AppTest) so it sees
+the same st.session_state the app does. Results are keyed by benchmark name
+so runs from different versions can be diffed directly.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from synthetic_ledger import add_ledger_arguments, ledger_from_arguments
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_MODULE = "budget_tracker_claude_weeklyvelocity"
+SCHEMA_VERSION = 1
+
+
+def _helpers_script():
+    """Script run by AppTest: load the ledger, then time each helper"""
+    import io
+    import sys
+    import time
+
+    import streamlit as st
+
+    config = st.session_state.benchmark_config
+    sys.path.insert(0, config['root'])
+    app = __import__(config['app_module'])
+
+    def timed(func):
+        samples = []
+        for _ in range(config['repeats']):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    app.initialize_session_state()
+    timings = {'csv_import': timed(lambda: app.import_budget_data(io.StringIO(config['ledger_csv'])))}
+    current_month = st.session_state.current_month_year
+    timings['get_spending_velocity_data'] = timed(app.get_spending_velocity_data)
+    timings['get_category_trends'] = timed(app.get_category_trends)
+    timings['get_expenses_by_month'] = timed(lambda: app.get_expenses_by_month(current_month))
+    timings['get_available_months'] = timed(app.get_available_months)
+    timings['csv_export'] = timed(app.export_budget_data)
+    st.session_state.benchmark_timings = timings
+    st.session_state.benchmark_rows = len(st.session_state.expenses)
+
+
+def _dashboard_script():
+    """Script run by AppTest: import the ledger once, then time main_dashboard per rerun"""
+    import io
+    import sys
+    import time
+
+    import streamlit as st
+
+    config = st.session_state.benchmark_config
+    sys.path.insert(0, config['root'])
+    app = __import__(config['app_module'])
+
+    app.initialize_session_state()
+    if not st.session_state.get('benchmark_loaded'):
+        app.import_budget_data(io.StringIO(config['ledger_csv']))
+        st.session_state.benchmark_loaded = True
+        st.session_state.benchmark_renders = []
+
+    start = time.perf_counter()
+    app.main_dashboard()
+    st.session_state.benchmark_renders.append(time.perf_counter() - start)
+
+
+def summarize(samples):
+    """Reduce raw timings (seconds) to summary statistics in milliseconds"""
+    millis = [sample * 1000 for sample in samples]
+    return {
+        'repeats': len(millis),
+        'min_ms': round(min(millis), 3),
+        'median_ms': round(statistics.median(millis), 3),
+        'mean_ms': round(statistics.fmean(millis), 3),
+        'max_ms': round(max(millis), 3),
+    }
+
+
+def git_revision():
+    """Short git revision of the tree being benchmarked, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure_cold_starts(count):
+    """Run benchmarks/cold_start.py in fresh interpreters and collect its reports"""
+    reports = []
+    for _ in range(count):
+        completed = subprocess.run(
+            [sys.executable, str(Path(__file__).with_name("cold_start.py"))],
+            capture_output=True, text=True, cwd=ROOT,
+        )
+        # A non-zero exit only means the budget was exceeded; the report is still valid
+        reports.append(json.loads(completed.stdout))
+    return reports
+
+
+def _new_app_test(script, config, timeout):
+    at = AppTest.from_function(script, default_timeout=timeout)
+    at.session_state.benchmark_config = config
+    return at
+
+
+def _check(at, label):
+    if at.exception:
+        raise RuntimeError(f"{label} failed: {at.exception[0].message}")
+
+
+def run_benchmarks(ledger_csv, repeats=5, dashboard_renders=5, timeout=600, cold_starts=3):
+    """Run every benchmark and return the results dictionary"""
+    config = {
+        'root': str(ROOT),
+        'app_module': APP_MODULE,
+        'ledger_csv': ledger_csv,
+        'repeats': repeats,
+    }
+
+    helpers = _new_app_test(_helpers_script, config, timeout).run()
+    _check(helpers, "helper benchmarks")
+    results = {name: summarize(samples) for name, samples in helpers.session_state.benchmark_timings.items()}
+
+    dashboard = _new_app_test(_dashboard_script, config, timeout)
+    rerun_wall = []
+    for _ in range(dashboard_renders + 1):
+        start = time.perf_counter()
+        dashboard.run()
+        rerun_wall.append(time.perf_counter() - start)
+        _check(dashboard, "main_dashboard render")
+    # The first run also imports the ledger, so it is reported on its own
+    renders = dashboard.session_state.benchmark_renders
+    results['main_dashboard_first_render'] = summarize(renders[:1])
+    results['main_dashboard_render'] = summarize(renders[1:])
+    results['main_dashboard_apptest_rerun'] = summarize(rerun_wall[1:])
+
+    if cold_starts:
+        reports = measure_cold_starts(cold_starts)
+        results['cold_start_total'] = summarize([report['total_ms'] / 1000 for report in reports])
+        results['cold_start_first_paint_run'] = summarize([report['first_paint_run_ms'] / 1000 for report in reports])
+        results['cold_start_total']['budget_ms'] = reports[0]['budget_ms']
+        results['cold_start_total']['within_budget'] = all(report['within_budget'] for report in reports)
+        results['cold_start_total']['heavy_modules_loaded_by_app'] = reports[-1]['heavy_modules_loaded_by_app']
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'generated_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'rows': helpers.session_state.benchmark_rows,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_ledger_arguments(parser)
+    parser.add_argument("--ledger", type=Path, help="benchmark an existing export CSV instead of a synthetic one")
+    parser.add_argument("--repeats", type=int, default=5, help="timed calls per helper")
+    parser.add_argument("--renders", type=int, default=5, help="timed main_dashboard reruns")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per script run")
+    parser.add_argument("--cold-starts", type=int, default=3, help="fresh-interpreter welcome screen runs")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    ledger_csv = args.ledger.read_text() if args.ledger else ledger_from_arguments(args)
+    report = run_benchmarks(ledger_csv, args.repeats, args.renders, args.timeout, args.cold_starts)
+    report['ledger'] = {
+        'source': str(args.ledger) if args.ledger else 'synthetic',
+        'categories': args.categories,
+        'years': args.years,
+        'transactions_per_day': args.per_day,
+        'income_frequency': args.income_frequency,
+        'monthly_reset_day': args.reset_day,
+        'seed': args.seed,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Synthetic budget ledgers in the tracker's CSV export format.
+
+Usage: python benchmarks/synthetic_ledger.py --years 3 --per-day 8 > ledger.csv
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from budget_periods import (  # noqa: E402
+    WEEKDAYS, budget_month_ordinal, date_from_ordinal, day_ordinal, month_label, next_payment_day,
+    pay_anchor_day,
+)
+
+CSV_COLUMNS = [
+    'data_type', 'current_balance', 'income_amount', 'income_frequency', 'payment_day', 'setup_date',
+    'monthly_reset_day', 'current_month_year', 'categories', 'category_budgets', 'category_frequencies',
+    'date', 'category', 'amount', 'description', 'frequency',
+    'id', 'name', 'target_amount', 'current_amount', 'created_date', 'completed',
+]
+
+BASE_CATEGORIES = [
+    ('Groceries', 'Weekly', 150.0, 45.0),
+    ('Rent', 'Monthly', 1600.0, 0.0),
+    ('Transport', 'Weekly', 60.0, 12.0),
+    ('Dining', 'Weekly', 80.0, 25.0),
+    ('Utilities', 'Monthly', 220.0, 70.0),
+    ('Entertainment', 'Monthly', 150.0, 30.0),
+    ('Health', 'Monthly', 120.0, 40.0),
+    ('Shopping', 'Monthly', 250.0, 55.0),
+]
+
+
+def build_categories(count):
+    """Category names, frequencies, budgets and typical amounts"""
+    categories = list(BASE_CATEGORIES[:count])
+    for i in range(len(categories), count):
+        frequency = "Weekly" if i % 2 else "Monthly"
+        categories.append((f"Category {i + 1}", frequency, 100.0, 20.0))
+    return categories
+
+
+def generate_ledger_csv(categories=8, years=2, transactions_per_day=5, income_frequency="Fortnightly",
+                        monthly_reset_day=1, savings_goals=3, seed=0, today=None):
+    """Return a ledger of the given shape as CSV text ready for import_budget_data"""
+    rnd = random.Random(seed)
+    today = today or date.today()
+    end_day = day_ordinal(today)
+    start_day = end_day - int(years * 365)
+    setup_date = datetime.combine(date_from_ordinal(start_day), datetime.min.time())
+    category_specs = build_categories(categories)
+    payment_day = 15 if income_frequency == "Monthly" else WEEKDAYS[4]
+    income_amount = {"Weekly": 1100.0, "Fortnightly": 2200.0, "Monthly": 4800.0}[income_frequency]
+
+    rows = [{
+        'data_type': 'user_settings',
+        'current_balance': 2500.0,
+        'income_amount': income_amount,
+        'income_frequency': income_frequency,
+        'payment_day': str(payment_day),
+        'setup_date': setup_date.isoformat(),
+        'monthly_reset_day': monthly_reset_day,
+        'current_month_year': month_label(budget_month_ordinal(end_day, monthly_reset_day)),
+        'categories': '|'.join(name for name, _, _, _ in category_specs),
+        'category_budgets': '|'.join(f"{name}:{budget}" for name, _, budget, _ in category_specs),
+        'category_frequencies': '|'.join(f"{name}:{frequency}" for name, frequency, _, _ in category_specs),
+    }]
+
+    anchor_day = pay_anchor_day(payment_day, start_day) if income_frequency != "Monthly" else None
+    payday = next_payment_day(income_frequency, payment_day, start_day, anchor_day)
+    for day in range(start_day, end_day + 1):
+        if day == payday:
+            rows.append({
+                'data_type': 'expense',
+                'date': f"{date_from_ordinal(day).isoformat()} 09:00",
+                'category': 'Income',
+                'amount': -income_amount,
+                'description': f'{income_frequency} Income',
+                'frequency': income_frequency,
+            })
+            payday = next_payment_day(income_frequency, payment_day, day + 1, anchor_day)
+
+        for _ in range(rnd.randint(0, 2 * transactions_per_day)):
+            if rnd.random() < 0.05:
+                name, frequency, typical = "Other (No Budget)", "Monthly", 30.0
+            else:
+                name, frequency, _, typical = rnd.choice(category_specs)
+                typical = typical or 40.0
+            minute = rnd.randint(7 * 60, 22 * 60)
+            rows.append({
+                'data_type': 'expense',
+                'date': f"{date_from_ordinal(day).isoformat()} {minute // 60:02d}:{minute % 60:02d}",
+                'category': name,
+                'amount': round(rnd.uniform(0.2, 2.0) * typical, 2),
+                'description': f"{name} purchase {rnd.randint(1, 500)}",
+                'frequency': frequency,
+            })
+
+    for i in range(savings_goals):
+        target = rnd.choice([1000.0, 2500.0, 5000.0, 12000.0])
+        rows.append({
+            'data_type': 'savings_goal',
+            'id': i,
+            'name': f"Goal {i + 1}",
+            'target_amount': target,
+            'current_amount': round(target * rnd.random(), 2),
+            'description': '',
+            'created_date': setup_date.isoformat(),
+            'completed': False,
+        })
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def add_ledger_arguments(parser):
+    """Register the ledger shape options shared by the benchmark scripts"""
+    parser.add_argument("--categories", type=int, default=8, help="number of budget categories")
+    parser.add_argument("--years", type=float, default=2, help="years of transaction history")
+    parser.add_argument("--per-day", type=int, default=5, help="average transactions per day")
+    parser.add_argument("--income-frequency", choices=["Weekly", "Fortnightly", "Monthly"], default="Fortnightly")
+    parser.add_argument("--reset-day", type=int, default=1, help="monthly budget reset day")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def ledger_from_arguments(args):
+    """Generate a ledger from parsed add_ledger_arguments options"""
+    return generate_ledger_csv(
+        categories=args.categories,
+        years=args.years,
+        transactions_per_day=args.per_day,
+        income_frequency=args.income_frequency,
+        monthly_reset_day=args.reset_day,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_ledger_arguments(parser)
+    sys.stdout.write(ledger_from_arguments(parser.parse_args()))
@@ -0,0 +1,192 @@
+"""Integer date arithmetic for budget periods.
+
+Every date is reduced to a day ordinal (days since 1970-01-01). Weeks,
+budget months and pay periods are then plain integer ordinals derived from it.
+All functions only use +, -, *, // and comparisons, so they work the same on
+Python ints and on numpy integer arrays.
+"""
+from datetime import date, timedelta
+
+EPOCH = date(1970, 1, 1)
+MINUTES_PER_DAY = 1440
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# 1970-01-01 was a Thursday, so Monday-aligned weeks start 3 days later
+_WEEK_OFFSET = 3
+
+
+def days_from_civil(year, month, day):
+    """Convert a proleptic Gregorian (year, month, day) to a day ordinal"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def civil_from_days(days):
+    """Convert a day ordinal back to (year, month, day)"""
+    z = days + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = shifted_month + 3 - 12 * (shifted_month >= 10)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def days_in_month(year, month):
+    """Number of days in the given calendar month"""
+    next_year = year + (month == 12)
+    next_month = month % 12 + 1
+    return days_from_civil(next_year, next_month, 1) - days_from_civil(year, month, 1)
+
+
+def day_ordinal(value):
+    """Day ordinal for a date, datetime or 'YYYY-MM-DD[ HH:MM]' string"""
+    if isinstance(value, str):
+        # Slicing is much cheaper than strptime and the format is fixed
+        return days_from_civil(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+    return days_from_civil(value.year, value.month, value.day)
+
+
+def parse_timestamp(text):
+    """Minutes since the epoch for a 'YYYY-MM-DD HH:MM' string, validating each field"""
+    if len(text) != 16 or text[4] != '-' or text[7] != '-' or text[10] != ' ' or text[13] != ':':
+        raise ValueError(f"Invalid timestamp {text!r}, expected YYYY-MM-DD HH:MM")
+    year, month, day = int(text[0:4]), int(text[5:7]), int(text[8:10])
+    hour, minute = int(text[11:13]), int(text[14:16])
+    if not (1 <= month <= 12 and 1 <= day <= days_in_month(year, month) and hour < 24 and minute < 60):
+        raise ValueError(f"Invalid timestamp {text!r}")
+    return days_from_civil(year, month, day) * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def timestamp_from_datetime(value):
+    """Minutes since the epoch for a datetime (seconds are dropped)"""
+    return day_ordinal(value) * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def format_timestamp(minutes):
+    """Format minutes since the epoch as 'YYYY-MM-DD HH:MM'"""
+    year, month, day = civil_from_days(minutes // MINUTES_PER_DAY)
+    minute_of_day = minutes % MINUTES_PER_DAY
+    return f"{year:04d}-{month:02d}-{day:02d} {minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+def today_ordinal():
+    """Day ordinal for today"""
+    return day_ordinal(date.today())
+
+
+def date_from_ordinal(day):
+    """Convert a day ordinal back to a date"""
+    return EPOCH + timedelta(days=int(day))
+
+
+def weekday(day):
+    """Weekday of a day ordinal (0 = Monday, 6 = Sunday)"""
+    return (day + _WEEK_OFFSET) % 7
+
+
+def week_ordinal(day):
+    """Monday-aligned week ordinal for a day ordinal"""
+    return (day + _WEEK_OFFSET) // 7
+
+
+def week_start(week):
+    """Day ordinal of the Monday that starts a week ordinal"""
+    return week * 7 - _WEEK_OFFSET
+
+
+def month_ordinal(year, month):
+    """Calendar month ordinal (year * 12 + month - 1)"""
+    return year * 12 + month - 1
+
+
+def budget_month_ordinal(day, reset_day=1):
+    """Budget month ordinal for a day, where each month starts on reset_day"""
+    year, month, day_of_month = civil_from_days(day)
+    return year * 12 + month - 1 - (day_of_month < reset_day)
+
+
+def quarter_start(day):
+    """Day ordinal of the first day of the calendar quarter containing day"""
+    year, month, _ = civil_from_days(day)
+    return days_from_civil(year, month - (month - 1) % 3, 1)
+
+
+def month_label(ordinal):
+    """Format a month ordinal as 'YYYY-MM'"""
+    return f"{ordinal // 12}-{ordinal % 12 + 1:02d}"
+
+
+def parse_month_label(label):
+    """Parse a 'YYYY-MM' label into a month ordinal"""
+    return month_ordinal(int(label[0:4]), int(label[5:7]))
+
+
+def month_display_name(ordinal):
+    """Format a month ordinal as e.g. 'March 2024'"""
+    return date(ordinal // 12, ordinal % 12 + 1, 1).strftime('%B %Y')
+
+
+def weekday_index(payment_day):
+    """Index of a weekday name, falling back to Monday for unknown values"""
+    return WEEKDAYS.index(payment_day) if payment_day in WEEKDAYS else 0
+
+
+def pay_anchor_day(payment_day, start_day):
+    """First day on or after start_day that falls on the payment weekday"""
+    return start_day + (weekday_index(payment_day) - weekday(start_day)) % 7
+
+
+def next_payment_day(frequency, payment_day, today, anchor_day=None):
+    """Day ordinal of the next payday on or after today"""
+    if frequency == "Monthly":
+        year, month, day_of_month = civil_from_days(today)
+        if day_of_month > min(payment_day, days_in_month(year, month)):
+            year, month = year + (month == 12), month % 12 + 1
+        return days_from_civil(year, month, min(payment_day, days_in_month(year, month)))
+
+    if frequency == "Fortnightly":
+        if anchor_day is None:
+            anchor_day = pay_anchor_day(payment_day, today)
+        # Paydays fall on anchor_day + 14k; take the first one not before today
+        return anchor_day - (anchor_day - today) // 14 * 14
+    return pay_anchor_day(payment_day, today)
+
+
+
+def pay_period_length(frequency):
+    """Days in a weekly or fortnightly pay period"""
+    return 14 if frequency == "Fortnightly" else 7
+
+
+def pay_period_ordinal(day, frequency, payment_day, anchor_day=None):
+    """Ordinal of the pay period (a payday up to the day before the next) containing day
+
+    Weekly and fortnightly periods are counted from anchor_day, which must be a
+    payday; monthly ones are calendar months starting on payment_day (clamped to
+    the month's length), so anchor_day is ignored.
+    """
+    if frequency == "Monthly":
+        year, month, day_of_month = civil_from_days(day)
+        return year * 12 + month - 1 - (day_of_month < min(payment_day, days_in_month(year, month)))
+    if anchor_day is None:
+        anchor_day = pay_anchor_day(payment_day, 0)
+    return (day - anchor_day) // pay_period_length(frequency)
+
+
+def pay_period_start(ordinal, frequency, payment_day, anchor_day=None):
+    """Day ordinal of the payday that starts a pay period ordinal"""
+    if frequency == "Monthly":
+        year, month = ordinal // 12, ordinal % 12 + 1
+        return days_from_civil(year, month, min(payment_day, days_in_month(year, month)))
+    if anchor_day is None:
+        anchor_day = pay_anchor_day(payment_day, 0)
+    return anchor_day + ordinal * pay_period_length(frequency)
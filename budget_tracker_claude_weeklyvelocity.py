@@ -1,7 +1,36 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime, date, timedelta
+from dataclasses import replace
+from datetime import datetime, date
+from itertools import islice
 import json
+from anomalies import SPIKE, AnomalyDetector
+from balance_ledger import BalanceLedger
+from budget_periods import (
+    MINUTES_PER_DAY, budget_month_ordinal, date_from_ordinal, day_ordinal, format_timestamp, month_display_name,
+    month_label, next_payment_day, parse_month_label, parse_timestamp, pay_anchor_day, pay_period_ordinal,
+    pay_period_start, quarter_start, timestamp_from_datetime, today_ordinal, week_ordinal, week_start, weekday,
+)
+from categories import CategoryDictionary
+from currencies import DEFAULT_BASE_CURRENCY, RateTable
+from history import Command, CommandLog
+from envelopes import MONTHS, PAY_PERIODS, WEEKS, EnvelopeLedger
+from charts import render_bar_chart, render_line_chart
+from money import dollars, format_cents, to_cents
+from instrumentation import (
+    begin_rerun, capture_profile, display_profile_panel, enabled_by_default, end_rerun, instrumented,
+    timed_section,
+)
+from reports import REPORTS, CategoryMonthMatrix, comparison_ranges
+from savings import (
+    DAYS_PER_MONTH, RATE_WINDOW_DAYS, GoalMap, allocate_surplus, contribution_rates, days_to_complete,
+    days_to_complete_with_surplus, remaining_cents,
+)
+from search_index import TransactionIndex
+from velocity import CALENDAR, MAX_LOOKBACK, MIN_LOOKBACK, ROLLING, DailySpend, comparison_windows, velocity
+from records import (
+    GOAL_CONTRIBUTION_COLUMNS, SAVINGS_GOAL_COLUMNS, TRANSACTION_COLUMNS, Expense, GoalContribution, IncomeRecord,
+    SavingsGoal, transaction_from_row,
+)
 
 st.set_page_config(page_title="Personal Budget Tracker", page_icon="💰", layout="wide")
 
@@ -13,8 +42,12 @@ def initialize_session_state():
         st.session_state.user_data = {}
     if 'expenses' not in st.session_state:
         st.session_state.expenses = []
+    if 'balance_ledger' not in st.session_state:
+        st.session_state.balance_ledger = BalanceLedger(0, st.session_state.expenses)
     if 'savings_goals' not in st.session_state:
-        st.session_state.savings_goals = []
+        st.session_state.savings_goals = GoalMap()
+    if 'category_dictionary' not in st.session_state:
+        st.session_state.category_dictionary = CategoryDictionary()
     if 'last_updated' not in st.session_state:
         st.session_state.last_updated = datetime.now().date()
     if 'current_month_year' not in st.session_state:
@@ -22,6 +55,10 @@ def initialize_session_state():
         st.session_state.current_month_year = f"{today.year}-{today.month:02d}"
     if 'last_reset_check' not in st.session_state:
         st.session_state.last_reset_check = datetime.now().date()
+    if 'next_split_id' not in st.session_state:
+        st.session_state.next_split_id = 1
+    if 'command_log' not in st.session_state:
+        st.session_state.command_log = CommandLog()
 
 def save_user_data():
     """Save user data to session state (in a real app, this would save to a database)"""
@@ -31,40 +68,286 @@ def load_user_data():
     """Load user data from storage (in a real app, this would load from a database)"""
     pass
 
-def calculate_next_payment_date(frequency, payment_day):
-    """Calculate when the next payment should occur"""
-    today = date.today()
+def ledger_rows():
+    """Number of stored transactions, i.e. rows scanned by a full-ledger pass"""
+    return len(st.session_state.expenses)
+
+def category_name(transaction):
+    """Current name of a transaction's category"""
+    return st.session_state.category_dictionary.name(transaction.category_code)
+
+def stamp_budget_period(transaction, reset_day, schedule):
+    """Store the budget month and pay period ordinals a transaction falls in"""
+    day = transaction.day
+    transaction.budget_month = budget_month_ordinal(day, reset_day)
+    transaction.pay_period = pay_period_ordinal(day, *schedule)
+    return transaction
+
+def add_transaction(transaction):
+    """Record a transaction, assigning its budget periods once at insert; returns any anomaly flags it raised"""
+    reset_day = st.session_state.user_data.get('monthly_reset_day', 1)
+    # Backfilled before the append if needed, so the new row is scored as it arrives
+    detector = get_anomaly_detector()
+    st.session_state.balance_ledger.append(stamp_budget_period(transaction, reset_day, pay_schedule()))
+    index = live_search_index()
+    if index is not None:
+        index.add(transaction)
+    envelopes = live_envelope_ledger()
+    if envelopes is not None:
+        envelopes.add(transaction)
+    return detector.add(transaction)
+
+def new_split_id():
+    """A split id no transaction uses yet"""
+    split_id = st.session_state.next_split_id
+    st.session_state.next_split_id += 1
+    return split_id
+
+def remove_transaction(index):
+    """Delete the transaction at index; the balance follows automatically"""
+    transaction = st.session_state.balance_ledger.pop(index)
+    search_index = live_search_index()
+    if search_index is not None:
+        search_index.remove(transaction)
+    detector = live_anomaly_detector()
+    if detector is not None:
+        detector.remove(transaction)
+    envelopes = live_envelope_ledger()
+    if envelopes is not None:
+        envelopes.remove(transaction)
+    return transaction
+
+def transactions_command(label, added=(), deleted=()):
+    """Command recording some transactions and deleting others; undoing it does the reverse"""
+    added, deleted = list(added), list(deleted)
+    
+    def change(to_remove, to_add):
+        flags = []
+        for transaction in to_remove:
+            remove_transaction(st.session_state.balance_ledger.index_of(transaction))
+        for transaction in to_add:
+            flags.extend(add_transaction(transaction))
+        return flags
+    
+    return Command(label, lambda: change(deleted, added), lambda: change(added, deleted))
+
+def run_command(command, message=None):
+    """Apply a change through the undo log, then rerun the page
+    
+    The balance, overview metrics and Undo/Redo buttons are drawn before the
+    dashboard sections, so they only show the change after a rerun. Anything
+    to tell the user is kept in session state and shown by that rerun.
+    """
+    flags = st.session_state.command_log.run(command)
+    if flags:
+        # Shown above the expense form
+        st.session_state.new_anomaly_flags = flags
+    if message:
+        # Shown under the page title
+        st.session_state.change_message = message
+    st.rerun()
+
+def live_search_index():
+    """The search index if it has been built for the current transaction list, else None"""
+    index = st.session_state.get('search_index')
+    if index is not None and index.transactions is st.session_state.expenses:
+        return index
+    return None
+
+@instrumented(rows=ledger_rows)
+def get_search_index():
+    """The transaction search index, built on first use after a load"""
+    index = live_search_index()
+    if index is None:
+        index = st.session_state.search_index = TransactionIndex(st.session_state.expenses)
+    return index
+
+def live_anomaly_detector():
+    """The anomaly detector if it has been built for the current transaction list, else None"""
+    detector = st.session_state.get('anomaly_detector')
+    if detector is not None and detector.transactions is st.session_state.expenses:
+        return detector
+    return None
+
+@instrumented(rows=ledger_rows)
+def get_anomaly_detector():
+    """The anomaly detector, backfilled over the whole ledger on first use after a load"""
+    detector = live_anomaly_detector()
+    if detector is None:
+        detector = st.session_state.anomaly_detector = AnomalyDetector.from_transactions(st.session_state.expenses)
+    return detector
+
+def current_balance():
+    """Current balance in cents, derived from the opening balance and all transactions"""
+    return st.session_state.balance_ledger.balance_cents
+
+def chart_data_version():
+    """Changes whenever anything the analytics charts are computed from changes"""
+    return (
+        st.session_state.balance_ledger.version,
+        st.session_state.category_dictionary.version,
+        json.dumps(st.session_state.user_data, sort_keys=True, default=str),
+        today_ordinal(),
+    )
+
+def ensure_balance_ledger():
+    """Rebuild the balance ledger if the transaction list was replaced behind its back"""
+    ledger = st.session_state.balance_ledger
+    if ledger.transactions is not st.session_state.expenses:
+        st.session_state.balance_ledger = BalanceLedger(ledger.opening_cents, st.session_state.expenses)
+
+def base_currency():
+    """Currency amounts are stored, budgeted and totalled in"""
+    return st.session_state.user_data.get('base_currency', DEFAULT_BASE_CURRENCY)
+
+@instrumented(rows=ledger_rows)
+def convert_foreign_transactions(rate_table):
+    """Re-value every foreign-currency transaction at a rate table's rates; returns how many changed"""
+    import numpy as np
+    
+    foreign = [transaction for transaction in st.session_state.expenses if transaction.currency]
+    if not foreign:
+        return 0
+    
+    total = len(foreign)
+    converted = rate_table.convert(
+        [transaction.currency for transaction in foreign],
+        np.fromiter((transaction.timestamp for transaction in foreign), dtype=np.int64, count=total) // MINUTES_PER_DAY,
+        np.fromiter((transaction.original_cents for transaction in foreign), dtype=np.int64, count=total),
+    )
+    changed = 0
+    for transaction, cents in zip(foreign, converted.tolist()):
+        if transaction.amount_cents != cents:
+            transaction.amount_cents = cents
+            changed += 1
+    if changed:
+        # The search index, anomaly and envelope caches follow the list, so a new list rebuilds them
+        st.session_state.expenses = list(st.session_state.expenses)
+        st.session_state.balance_ledger = BalanceLedger(st.session_state.balance_ledger.opening_cents,
+                                                        st.session_state.expenses)
+    return changed
+
+def load_exchange_rates(uploaded_file):
+    """Load a rate table file and re-value foreign transactions with it"""
+    rate_table = RateTable.from_csv(uploaded_file, base_currency())
+    # Raises before changing anything if a foreign transaction's currency has no rates
+    changed = convert_foreign_transactions(rate_table)
+    st.session_state.rate_table = rate_table
+    return changed
+
+PAY_PERIOD = "Pay Period"
+BUDGET_FREQUENCIES = ["Monthly", "Weekly", PAY_PERIOD]
+# Approximate periods per month, for monthly equivalents of budgets and income
+PERIODS_PER_MONTH = {"Monthly": 1, "Fortnightly": 2.167, "Weekly": 4.33}
+
+def monthly_budget_equivalent(amount, frequency, income_frequency):
+    """Monthly equivalent of a per-week, per-pay-period or monthly budget amount"""
+    if frequency == PAY_PERIOD:
+        frequency = income_frequency
+    return amount * PERIODS_PER_MONTH[frequency]
+
+def monthly_surplus_cents():
+    """Monthly income left after the monthly equivalent of every category budget, in cents"""
+    user_data = st.session_state.user_data
+    income_frequency = user_data['income_frequency']
+    budgets = sum(
+        monthly_budget_equivalent(user_data['category_budgets'][cat], user_data['category_frequencies'][cat],
+                                  income_frequency)
+        for cat in user_data['categories']
+    )
+    return round(user_data['income_amount'] * PERIODS_PER_MONTH[income_frequency] - budgets)
+
+# Period each category's envelope carries over between, by budget frequency
+ROLLOVER_PERIODS = {"Monthly": MONTHS, "Weekly": WEEKS, PAY_PERIOD: PAY_PERIODS}
+
+def rollover_kinds():
+    """Envelope period kind per category code with rollover on
     
-    if frequency == "Monthly":
-        if today.day <= payment_day:
-            next_payment = today.replace(day=payment_day)
-        else:
-            if today.month == 12:
-                next_payment = date(today.year + 1, 1, payment_day)
-            else:
-                try:
-                    next_payment = today.replace(month=today.month + 1, day=payment_day)
-                except ValueError:
-                    next_payment = today.replace(month=today.month + 1, day=28)
-        return next_payment
-    
-    elif frequency == "Weekly":
-        days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        target_weekday = days_of_week.index(payment_day)
-        days_ahead = target_weekday - today.weekday()
-        if days_ahead <= 0:
-            days_ahead += 7
-        return today + timedelta(days=days_ahead)
-    
-    elif frequency == "Fortnightly":
-        days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        target_weekday = days_of_week.index(payment_day)
-        days_ahead = target_weekday - today.weekday()
-        if days_ahead <= 0:
-            days_ahead += 14
-        else:
-            days_ahead += 7
-        return today + timedelta(days=days_ahead)
+    Categories without a code have never been spent in, so there is nothing
+    to track yet; the first transaction assigns one and changes the key.
+    """
+    user_data = st.session_state.user_data
+    categories = st.session_state.category_dictionary
+    kinds = {}
+    for cat in user_data.get('category_rollover', {}):
+        code = categories.lookup(cat)
+        if code is not None and cat in user_data['category_frequencies']:
+            kinds[code] = ROLLOVER_PERIODS[user_data['category_frequencies'][cat]]
+    return kinds
+
+def rollover_period(kind, day):
+    """Ordinal of the budget month, week or pay period containing a day"""
+    if kind == MONTHS:
+        return budget_month_ordinal(day, st.session_state.user_data.get('monthly_reset_day', 1))
+    if kind == WEEKS:
+        return week_ordinal(day)
+    return pay_period_ordinal(day, *pay_schedule())
+
+def live_envelope_ledger():
+    """The envelope ledger if it matches the transaction list, rollover categories and periods, else None"""
+    cached = st.session_state.get('_envelope_ledger')
+    if cached is not None and cached[1].transactions is st.session_state.expenses \
+            and cached[0] == (rollover_kinds(), budget_period_settings()):
+        return cached[1]
+    return None
+
+@instrumented(rows=ledger_rows)
+def get_envelope_ledger():
+    """Cumulative spending per rollover category and period, built on first use and then kept up to date"""
+    ledger = live_envelope_ledger()
+    if ledger is None:
+        ensure_budget_periods()
+        key = (rollover_kinds(), budget_period_settings())
+        ledger = EnvelopeLedger(st.session_state.expenses, key[0])
+        st.session_state._envelope_ledger = (key, ledger)
+    return ledger
+
+def budget_period_settings():
+    """Everything the stamped budget months and pay periods depend on"""
+    return st.session_state.user_data.get('monthly_reset_day', 1), pay_schedule()
+
+@instrumented(rows=ledger_rows)
+def recompute_budget_periods():
+    """Re-assign every transaction's budget periods, e.g. after the reset day or pay schedule changes"""
+    settings = budget_period_settings()
+    for transaction in st.session_state.expenses:
+        stamp_budget_period(transaction, *settings)
+    st.session_state.budget_period_settings = settings
+
+def ensure_budget_periods():
+    """Recompute budget periods if they were assigned with different settings"""
+    if st.session_state.get('budget_period_settings') != budget_period_settings():
+        recompute_budget_periods()
+
+def get_pay_anchor_day():
+    """Day ordinal of the first payday on or after the setup date (anchors fortnights)"""
+    user_data = st.session_state.user_data
+    setup_day = day_ordinal(datetime.fromisoformat(user_data['setup_date']))
+    return pay_anchor_day(user_data['payment_day'], setup_day)
+
+def pay_schedule():
+    """(income_frequency, payment_day, anchor_day) that pay periods are counted with"""
+    user_data = st.session_state.user_data
+    frequency = user_data.get('income_frequency', "Monthly")
+    payment_day = user_data.get('payment_day', 1)
+    anchor_day = None
+    if frequency != "Monthly" and user_data.get('setup_date'):
+        anchor_day = get_pay_anchor_day()
+    return frequency, payment_day, anchor_day
+
+def current_pay_period():
+    """Pay period ordinal containing today"""
+    return pay_period_ordinal(today_ordinal(), *pay_schedule())
+
+def pay_period_first_day(period):
+    """Day ordinal of the payday that starts a pay period"""
+    return pay_period_start(period, *pay_schedule())
+
+def calculate_next_payment_date(frequency, payment_day, anchor_day=None):
+    """Calculate when the next payment should occur (today counts as a payday)"""
+    if frequency == "Fortnightly" and anchor_day is None and st.session_state.user_data.get('setup_date'):
+        anchor_day = get_pay_anchor_day()
+    return date_from_ordinal(next_payment_day(frequency, payment_day, today_ordinal(), anchor_day))
 
 def check_monthly_reset():
     """Check if we need to reset for a new month based on user's reset day"""
@@ -78,16 +361,8 @@ def check_monthly_reset():
     # Get user's preferred reset day (default to 1st of month)
     reset_day = user_data.get('monthly_reset_day', 1)
     
-    # Calculate what the current month should be based on reset day
-    if today.day >= reset_day:
-        # We're past the reset day, so current month is this month
-        current_month_year = f"{today.year}-{today.month:02d}"
-    else:
-        # We're before the reset day, so current month is last month
-        if today.month == 1:
-            current_month_year = f"{today.year - 1}-12"
-        else:
-            current_month_year = f"{today.year}-{today.month - 1:02d}"
+    # Days before the reset day still belong to the previous budget month
+    current_month_year = month_label(budget_month_ordinal(day_ordinal(today), reset_day))
     
     # Check if we need to advance to a new month
     if current_month_year != st.session_state.current_month_year:
@@ -95,11 +370,11 @@ def check_monthly_reset():
         st.session_state.current_month_year = current_month_year
         
         # Show month transition message
-        old_date = datetime.strptime(old_month, "%Y-%m")
-        new_date = datetime.strptime(current_month_year, "%Y-%m")
+        old_name = month_display_name(parse_month_label(old_month))
+        new_name = month_display_name(parse_month_label(current_month_year))
         
-        st.success(f"📅 New budget month started! Tracking expenses for {new_date.strftime('%B %Y')}")
-        st.info(f"Previous month ({old_date.strftime('%B %Y')}) data has been archived and is still accessible for analysis.")
+        st.success(f"📅 New budget month started! Tracking expenses for {new_name}")
+        st.info(f"Previous month ({old_name}) data has been archived and is still accessible for analysis.")
     
     # Check for weekly reset (Monday)
     if today.weekday() == 0 and last_check.weekday() != 0:  # Today is Monday and last check wasn't Monday
@@ -107,86 +382,99 @@ def check_monthly_reset():
     
     st.session_state.last_reset_check = today.date()
 
-def get_spending_velocity_data():
-    """Calculate spending velocity for current week vs recent weeks"""
+VELOCITY_PERIODS = ["Week", "Rolling 7 days", "Pay period"]
+
+def get_daily_spend():
+    """Per-category daily spending, rebuilt only when the ledger, categories or date change"""
+    key = (st.session_state.balance_ledger.version, len(st.session_state.category_dictionary), today_ordinal())
+    cached = st.session_state.get('_daily_spend')
+    if cached is None or cached[0] != key:
+        with timed_section("daily_spend", ledger_rows):
+            daily = DailySpend(st.session_state.expenses, len(st.session_state.category_dictionary), key[-1])
+        cached = st.session_state._daily_spend = (key, daily)
+    return cached[1]
+
+@instrumented()
+def get_spending_velocity_data(period="Week", lookback=MIN_LOOKBACK, exponential=False):
+    """Spending so far this week, rolling 7 days or pay period vs the same stretch of the last lookback ones"""
     if not st.session_state.expenses:
         return None
     
-    today = datetime.now()
-    current_weekday = today.weekday()  # 0 = Monday, 6 = Sunday
-    
-    # Get current week expenses (Monday to now)
-    days_since_monday = today.weekday()
-    current_week_start = today - timedelta(days=days_since_monday)
-    current_week_start = current_week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Get expenses for current week so far
-    current_week_expenses = []
-    for expense in st.session_state.expenses:
-        if expense['amount'] > 0:  # Only count actual expenses, not income
-            expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-            if current_week_start <= expense_date <= today:
-                current_week_expenses.append(expense)
-    
-    current_week_spending = sum(exp['amount'] for exp in current_week_expenses)
-    
-    # Get last 4 complete weeks for comparison
-    past_weeks_spending = []
-    for week_offset in range(1, 5):  # Last 4 weeks
-        week_start = current_week_start - timedelta(weeks=week_offset)
-        week_end = week_start + timedelta(days=current_weekday)  # Same day of week as today
-        
-        week_expenses = []
-        for expense in st.session_state.expenses:
-            if expense['amount'] > 0:
-                expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-                if week_start <= expense_date <= week_end:
-                    week_expenses.append(expense)
-        
-        week_spending = sum(exp['amount'] for exp in week_expenses)
-        if week_spending > 0:  # Only include weeks with spending
-            past_weeks_spending.append(week_spending)
-    
-    if not past_weeks_spending:
-        return None
-    
-    # Calculate average spending for same period in past weeks
-    avg_past_spending = sum(past_weeks_spending) / len(past_weeks_spending)
+    today = today_ordinal()
+    if period == "Rolling 7 days":
+        starts, ends = comparison_windows(ROLLING, today, lookback)
+    else:
+        if period == "Pay period":
+            current_period, period_start = current_pay_period(), pay_period_first_day
+        else:
+            current_period, period_start = week_ordinal(today), week_start
+        starts, ends = comparison_windows(CALENDAR, today, lookback, period_start, current_period)
     
-    if avg_past_spending == 0:
+    current, average, compared = velocity(get_daily_spend(), starts, ends, exponential)
+    # The last row is every category together
+    if not compared or average[-1] == 0:
         return None
     
-    # Calculate velocity (percentage difference)
-    velocity_percent = ((current_week_spending - avg_past_spending) / avg_past_spending) * 100
+    categories = st.session_state.category_dictionary
+    category_velocity = [
+        {
+            'category': categories.name(code),
+            'current': dollars(int(current[code])),
+            'average': dollars(float(average[code])),
+            'velocity_percent': (current[code] - average[code]) / average[code] * 100 if average[code] else None,
+        }
+        for code in range(len(categories))
+        if current[code] or average[code]
+    ]
     
     return {
-        'current_week_spending': current_week_spending,
-        'avg_past_spending': avg_past_spending,
-        'velocity_percent': velocity_percent,
-        'weeks_compared': len(past_weeks_spending),
-        'current_weekday': current_weekday
+        'current_week_spending': dollars(int(current[-1])),
+        'avg_past_spending': dollars(float(average[-1])),
+        'velocity_percent': (current[-1] - average[-1]) / average[-1] * 100,
+        'weeks_compared': compared,
+        'current_weekday': weekday(today),
+        'period_start': int(starts[0]),
+        'categories': category_velocity,
     }
 
+@instrumented("velocity")
 def display_spending_velocity():
     """Display the spending velocity tracker"""
-    velocity_data = get_spending_velocity_data()
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        period = st.radio("Compare by:", VELOCITY_PERIODS, horizontal=True, key="velocity_period")
+    with col2:
+        lookback = st.slider("Periods to compare against:", MIN_LOOKBACK, MAX_LOOKBACK, MIN_LOOKBACK,
+                             key="velocity_lookback")
+    with col3:
+        exponential = st.checkbox("Weight recent periods more", key="velocity_weighted",
+                                  help="Each period counts half as much as the one four periods later")
+    
+    by_pay_period = period == "Pay period"
+    if by_pay_period:
+        period_name, title = "Pay Period", "⚡ Pay-Period Spending Velocity"
+    elif period == "Rolling 7 days":
+        period_name, title = "7-Day Window", "⚡ Rolling 7-Day Spending Velocity"
+    else:
+        period_name, title = "Week", "⚡ Weekly Spending Velocity"
+    velocity_data = get_spending_velocity_data(period, lookback, exponential)
     
     if not velocity_data:
         # Show placeholder when there's not enough data
-        st.subheader("⚡ Weekly Spending Velocity")
+        st.subheader(title)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("This Week", "$0.00")
+            st.metric(f"This {period_name}", "$0.00")
         
         with col2:
-            st.metric("Past Weeks Avg", "Not enough data")
+            st.metric(f"Past {period_name}s Avg", "Not enough data")
         
         with col3:
             st.metric("Spending Pace", "➡️ Building data...")
         
-        st.info("💡 **Getting started:** Add some expenses this week and last week to see your spending velocity! The tracker needs at least one week of historical data to compare against.")
+        st.info(f"💡 **Getting started:** Add some expenses this {period_name.lower()} and last {period_name.lower()} to see your spending velocity! The tracker needs at least one {period_name.lower()} of historical data to compare against.")
         return
     
     current_spending = velocity_data['current_week_spending']
@@ -199,19 +487,22 @@ def display_spending_velocity():
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     current_day = days[current_weekday]
     
-    st.subheader("⚡ Weekly Spending Velocity")
+    st.subheader(title)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric(
-            f"This Week (Mon-{current_day})",
-            f"${current_spending:.2f}"
-        )
+        if by_pay_period:
+            current_label = f"This Pay Period (since {date_from_ordinal(velocity_data['period_start']):%b %d})"
+        elif period == "Rolling 7 days":
+            current_label = "Last 7 Days"
+        else:
+            current_label = f"This Week (Mon-{current_day})"
+        st.metric(current_label, f"${current_spending:.2f}")
     
     with col2:
         st.metric(
-            f"Avg Past {weeks_compared} Weeks",
+            f"{'Weighted ' if exponential else ''}Avg Past {weeks_compared} {period_name}s",
             f"${avg_spending:.2f}"
         )
     
@@ -251,56 +542,81 @@ def display_spending_velocity():
     elif velocity > 5:
         st.info(f"📊 **Notice:** Your spending is slightly above your normal pace.")
     elif velocity < -20:
-        st.success(f"🎉 **Great job!** You're spending much less than usual this week.")
+        st.success(f"🎉 **Great job!** You're spending much less than usual this {period_name.lower()}.")
     elif velocity < -5:
         st.success(f"👍 **Nice!** You're spending below your normal pace.")
     else:
-        st.info(f"✅ **On track:** Your spending pace is similar to recent weeks.")
+        st.info(f"✅ **On track:** Your spending pace is similar to recent {period_name.lower()}s.")
+    
+    # Each category's spending this period against its own average
+    with st.expander("📂 Velocity by Category", expanded=False):
+        st.dataframe([
+            {
+                'Category': row['category'],
+                f'This {period_name}': row['current'],
+                'Average': round(row['average'], 2),
+                'Pace': f"{row['velocity_percent']:+.0f}%" if row['velocity_percent'] is not None else "New",
+            }
+            for row in sorted(velocity_data['categories'], key=lambda row: row['current'], reverse=True)
+        ], use_container_width=True, hide_index=True)
     
     # Show breakdown by day of week if we have enough data
-    if current_weekday >= 2:  # Wednesday or later
+    if current_weekday >= 2 and period == "Week":  # Wednesday or later
         with st.expander("📅 Daily Breakdown", expanded=False):
             st.write("**Spending by day this week:**")
             
             # Calculate daily spending for current week
-            today = datetime.now()
-            days_since_monday = today.weekday()
-            week_start = today - timedelta(days=days_since_monday)
+            current_week = week_ordinal(today_ordinal())
             
             daily_spending = {i: 0 for i in range(current_weekday + 1)}
             
-            for expense in st.session_state.expenses:
-                if expense['amount'] > 0:
-                    expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-                    if expense_date >= week_start.replace(hour=0, minute=0, second=0, microsecond=0):
-                        day_of_week = expense_date.weekday()
-                        if day_of_week <= current_weekday:
-                            daily_spending[day_of_week] += expense['amount']
+            for expense in st.session_state.balance_ledger.days_between(week_start(current_week), today_ordinal()):
+                if expense.amount_cents > 0:
+                    daily_spending[weekday(expense.day)] += expense.amount_cents
             
             for day_num in range(current_weekday + 1):
                 day_name = days[day_num]
-                amount = daily_spending[day_num]
+                amount = dollars(daily_spending[day_num])
                 st.write(f"• **{day_name}:** ${amount:.2f}")
 
+@instrumented("trends")
 def get_category_trends():
     """Calculate spending trends for each category"""
     if len(st.session_state.expenses) < 2:
         return {}
     
     user_data = st.session_state.user_data
+    categories = st.session_state.category_dictionary
     trends = {}
     
+    # One pass per period type covers every category at once
+    current_week_totals = get_category_spending_current_week()
+    past_week_totals = get_category_spending_past_weeks(4)
+    current_month_totals = get_category_spending_current_month()
+    past_month_totals = get_category_spending_past_months(3)
+    if PAY_PERIOD in user_data['category_frequencies'].values():
+        current_pay_period_totals = get_category_spending_current_pay_period()
+        past_pay_period_totals = get_category_spending_past_pay_periods(4)
+    
     for category in user_data['categories']:
         frequency = user_data['category_frequencies'][category]
+        code = categories.lookup(category)
         
-        if frequency == "Weekly":
+        if code is None:
+            # Never used, so there is no history to compare against
+            current_period_spending, past_periods_spending = 0, []
+        elif frequency == "Weekly":
             # Compare current week to average of last 4 weeks
-            current_period_spending = get_category_spending_current_week(category)
-            past_periods_spending = get_category_spending_past_weeks(category, 4)
+            current_period_spending = current_week_totals[code]
+            past_periods_spending = [week for week in past_week_totals[code] if week > 0]
+        elif frequency == PAY_PERIOD:
+            # Compare current pay period to average of last 4 pay periods
+            current_period_spending = current_pay_period_totals[code]
+            past_periods_spending = [period for period in past_pay_period_totals[code] if period > 0]
         else:
             # Compare current month to average of last 3 months
-            current_period_spending = get_category_spending_current_month(category)
-            past_periods_spending = get_category_spending_past_months(category, 3)
+            current_period_spending = current_month_totals[code]
+            past_periods_spending = [month for month in past_month_totals[code] if month > 0]
         
         if not past_periods_spending or len(past_periods_spending) == 0:
             trends[category] = {
@@ -355,157 +671,107 @@ def get_category_trends():
     
     return trends
 
-def get_category_spending_current_week(category):
-    """Get spending for a category in the current week"""
-    today = datetime.now()
-    days_since_monday = today.weekday()
-    week_start = today - timedelta(days=days_since_monday)
-    week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
+@instrumented()
+def get_category_spending_current_week():
+    """Spending in the current week in cents, as a list indexed by category code"""
+    today = today_ordinal()
+    
+    return st.session_state.category_dictionary.totals(
+        (expense.category_code, expense.amount_cents)
+        for expense in st.session_state.balance_ledger.days_between(week_start(week_ordinal(today)), today)
+        if expense.amount_cents > 0
+    )
+
+@instrumented()
+def get_category_spending_past_weeks(num_weeks):
+    """Cents spent in each of the past N weeks (most recent first), per category code"""
+    current_week = week_ordinal(today_ordinal())
+    
+    past_weeks = [[0] * num_weeks for _ in range(len(st.session_state.category_dictionary))]
+    rows = st.session_state.balance_ledger.days_between(week_start(current_week - num_weeks), week_start(current_week) - 1)
+    for expense in rows:
+        if expense.amount_cents > 0:
+            past_weeks[expense.category_code][current_week - week_ordinal(expense.day) - 1] += expense.amount_cents
+    
+    return past_weeks
+
+@instrumented()
+def get_category_spending_current_month():
+    """Spending in the current budget month in cents, as a list indexed by category code"""
+    current_month = parse_month_label(st.session_state.current_month_year)
+    
+    return st.session_state.category_dictionary.totals(
+        (expense.category_code, expense.amount_cents)
+        for expense in st.session_state.balance_ledger.in_budget_months(current_month, current_month)
+        if expense.amount_cents > 0
+    )
+
+@instrumented()
+def get_category_spending_past_months(num_months):
+    """Cents spent in each of the past N budget months (most recent first), per category code"""
+    current_month = parse_month_label(st.session_state.current_month_year)
     
-    spending = 0
-    for expense in st.session_state.expenses:
-        if expense['amount'] > 0 and expense['category'] == category:
-            expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-            if week_start <= expense_date <= today:
-                spending += expense['amount']
+    past_months = [[0] * num_months for _ in range(len(st.session_state.category_dictionary))]
+    for expense in st.session_state.balance_ledger.in_budget_months(current_month - num_months, current_month - 1):
+        if expense.amount_cents > 0:
+            past_months[expense.category_code][current_month - expense.budget_month - 1] += expense.amount_cents
     
-    return spending
+    return past_months
 
-def get_category_spending_past_weeks(category, num_weeks):
-    """Get spending for a category in past N weeks"""
-    today = datetime.now()
-    days_since_monday = today.weekday()
-    current_week_start = today - timedelta(days=days_since_monday)
-    
-    past_weeks = []
-    for week_offset in range(1, num_weeks + 1):
-        week_start = current_week_start - timedelta(weeks=week_offset)
-        week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-        
-        week_spending = 0
-        for expense in st.session_state.expenses:
-            if expense['amount'] > 0 and expense['category'] == category:
-                expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-                if week_start <= expense_date <= week_end:
-                    week_spending += expense['amount']
-        
-        past_weeks.append(week_spending)
-    
-    return [week for week in past_weeks if week > 0]  # Only return weeks with spending
-
-def get_category_spending_current_month(category):
-    """Get spending for a category in the current budget month"""
-    current_month = st.session_state.current_month_year
-    spending = 0
-    
-    for expense in st.session_state.expenses:
-        if expense['amount'] > 0 and expense['category'] == category:
-            expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-            expense_month = f"{expense_date.year}-{expense_date.month:02d}"
-            
-            if expense_month == current_month:
-                spending += expense['amount']
-    
-    return spending
-
-def get_category_spending_past_months(category, num_months):
-    """Get spending for a category in past N budget months"""
-    current_month = st.session_state.current_month_year
-    current_date = datetime.strptime(current_month, "%Y-%m")
-    
-    past_months = []
-    for month_offset in range(1, num_months + 1):
-        # Calculate past month
-        if current_date.month - month_offset <= 0:
-            past_month = current_date.replace(
-                year=current_date.year - 1,
-                month=12 + (current_date.month - month_offset)
-            )
-        else:
-            past_month = current_date.replace(month=current_date.month - month_offset)
-        
-        past_month_str = f"{past_month.year}-{past_month.month:02d}"
-        
-        month_spending = 0
-        for expense in st.session_state.expenses:
-            if expense['amount'] > 0 and expense['category'] == category:
-                expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-                expense_month = f"{expense_date.year}-{expense_date.month:02d}"
-                
-                if expense_month == past_month_str:
-                    month_spending += expense['amount']
-        
-        past_months.append(month_spending)
+@instrumented()
+def get_category_spending_current_pay_period():
+    """Spending in the current pay period in cents, as a list indexed by category code"""
+    current_period = current_pay_period()
+    
+    return st.session_state.category_dictionary.totals(
+        (expense.category_code, expense.amount_cents)
+        for expense in st.session_state.balance_ledger.in_pay_periods(current_period, current_period)
+        if expense.amount_cents > 0 and expense.day <= today_ordinal()
+    )
+
+@instrumented()
+def get_category_spending_past_pay_periods(num_periods):
+    """Cents spent in each of the past N pay periods (most recent first), per category code"""
+    current_period = current_pay_period()
     
-    return [month for month in past_months if month > 0]  # Only return months with spending
+    past_periods = [[0] * num_periods for _ in range(len(st.session_state.category_dictionary))]
+    for expense in st.session_state.balance_ledger.in_pay_periods(current_period - num_periods, current_period - 1):
+        if expense.amount_cents > 0:
+            past_periods[expense.category_code][current_period - expense.pay_period - 1] += expense.amount_cents
+    
+    return past_periods
 
+@instrumented()
 def get_current_week_expenses():
     """Get expenses for the current week (Monday to Sunday)"""
-    today = datetime.now()
-    
-    # Calculate the start of this week (Monday)
-    days_since_monday = today.weekday()
-    week_start = today - timedelta(days=days_since_monday)
-    week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Calculate the end of this week (Sunday)
-    week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-    
-    current_week_expenses = []
+    monday = week_start(week_ordinal(today_ordinal()))
     
-    for expense in st.session_state.expenses:
-        expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-        
-        if week_start <= expense_date <= week_end:
-            current_week_expenses.append(expense)
-    
-    return current_week_expenses
+    return st.session_state.balance_ledger.days_between(monday, monday + 6)
 
 def get_current_month_expenses():
     """Get expenses for the current budget month"""
-    current_month = st.session_state.current_month_year
-    current_expenses = []
-    
-    for expense in st.session_state.expenses:
-        expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-        expense_month = f"{expense_date.year}-{expense_date.month:02d}"
-        
-        if expense_month == current_month:
-            current_expenses.append(expense)
-    
-    return current_expenses
+    return get_expenses_by_month(st.session_state.current_month_year)
 
+@instrumented()
 def get_expenses_by_month(month_year=None):
     """Get expenses for a specific month (format: YYYY-MM)"""
     if month_year is None:
         month_year = st.session_state.current_month_year
     
-    month_expenses = []
-    
-    for expense in st.session_state.expenses:
-        expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-        expense_month = f"{expense_date.year}-{expense_date.month:02d}"
-        
-        if expense_month == month_year:
-            month_expenses.append(expense)
+    month = parse_month_label(month_year)
     
-    return month_expenses
+    return st.session_state.balance_ledger.in_budget_months(month, month)
 
+@instrumented()
 def get_available_months():
     """Get list of all months that have expenses"""
-    months = set()
-    
-    for expense in st.session_state.expenses:
-        expense_date = datetime.strptime(expense['date'], "%Y-%m-%d %H:%M")
-        month_year = f"{expense_date.year}-{expense_date.month:02d}"
-        months.add(month_year)
+    months = set(st.session_state.balance_ledger.budget_months())
     
     # Always include current month
-    months.add(st.session_state.current_month_year)
+    months.add(parse_month_label(st.session_state.current_month_year))
     
     # Sort months (newest first)
-    sorted_months = sorted(list(months), reverse=True)
-    return sorted_months
+    return [month_label(month) for month in sorted(months, reverse=True)]
 
 def check_and_add_income():
     """Check if income should be added and handle it"""
@@ -524,19 +790,18 @@ def check_and_add_income():
     if today >= next_payment_date and last_updated < today:
         income_to_add = user_data['income_amount']
         
-        st.success(f"🎉 Payday! Your {user_data['income_frequency'].lower()} income of ${income_to_add:,.2f} has been added to your balance!")
+        st.success(f"🎉 Payday! Your {user_data['income_frequency'].lower()} income of ${dollars(income_to_add):,.2f} has been added to your balance!")
         
-        st.session_state.user_data['current_balance'] += income_to_add
         st.session_state.last_updated = today
         
-        income_record = {
-            'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
-            'category': 'Income',
-            'amount': -income_to_add,
-            'description': f'{user_data["income_frequency"]} Income',
-            'frequency': user_data['income_frequency']
-        }
-        st.session_state.expenses.append(income_record)
+        income_record = IncomeRecord(
+            timestamp=timestamp_from_datetime(datetime.now()),
+            category_code=st.session_state.category_dictionary.code('Income'),
+            amount_cents=-income_to_add,
+            description=f'{user_data["income_frequency"]} Income',
+            frequency=user_data['income_frequency']
+        )
+        add_transaction(income_record)
 
 def update_income_section():
     """Allow users to update their income information"""
@@ -549,7 +814,7 @@ def update_income_section():
         
         with col1:
             new_income = st.number_input("New Income Amount ($):", 
-                                       value=float(user_data['income_amount']), 
+                                       value=dollars(user_data['income_amount']), 
                                        min_value=0.0, step=0.01)
         with col2:
             new_frequency = st.selectbox("Income Frequency:", 
@@ -568,7 +833,7 @@ def update_income_section():
         col1, col2 = st.columns(2)
         with col1:
             if st.form_submit_button("Update Income", type="primary"):
-                st.session_state.user_data['income_amount'] = new_income
+                st.session_state.user_data['income_amount'] = to_cents(new_income)
                 st.session_state.user_data['income_frequency'] = new_frequency
                 st.session_state.user_data['payment_day'] = new_payment_day
                 st.success("Income information updated successfully!")
@@ -580,6 +845,96 @@ def update_income_section():
                 st.session_state.show_income_update = False
                 st.rerun()
 
+def rename_category(old_name, new_name):
+    """Rename a budget category everywhere; False if another budget category has the new name"""
+    categories = st.session_state.category_dictionary
+    user_data = st.session_state.user_data
+    if new_name in user_data['categories']:
+        return False
+    
+    # Transactions hold the category code, so existing history follows the rename.
+    # A name the dictionary already has (a removed category, Income, Other) keeps
+    # its own code; category_edit_command moves the transactions over to it
+    if old_name in categories and new_name not in categories:
+        categories.rename(old_name, new_name)
+    user_data['categories'][user_data['categories'].index(old_name)] = new_name
+    user_data['category_budgets'] = {
+        (new_name if name == old_name else name): budget for name, budget in user_data['category_budgets'].items()
+    }
+    user_data['category_frequencies'] = {
+        (new_name if name == old_name else name): frequency
+        for name, frequency in user_data['category_frequencies'].items()
+    }
+    if old_name in user_data.get('category_rollover', {}):
+        user_data['category_rollover'][new_name] = user_data['category_rollover'].pop(old_name)
+    return True
+
+def category_settings(name):
+    """(name, budget cents, frequency, rollover start or None) of a budget category"""
+    user_data = st.session_state.user_data
+    return (name, user_data['category_budgets'][name], user_data['category_frequencies'][name],
+            user_data.get('category_rollover', {}).get(name))
+
+def set_category(name, settings, position=None):
+    """Add or update (and if need be rename) a budget category from category_settings"""
+    user_data = st.session_state.user_data
+    new_name, budget_cents, frequency, rollover_since = settings
+    if name not in user_data['categories']:
+        user_data['categories'].insert(len(user_data['categories']) if position is None else position, new_name)
+    elif new_name != name and not rename_category(name, new_name):
+        raise ValueError(f"A category named {new_name} already exists!")
+    user_data['category_budgets'][new_name] = budget_cents
+    user_data['category_frequencies'][new_name] = frequency
+    category_rollover = user_data.setdefault('category_rollover', {})
+    if rollover_since is None:
+        category_rollover.pop(new_name, None)
+    else:
+        category_rollover[new_name] = rollover_since
+
+def delete_category(name):
+    """Drop a budget category; its transactions keep their code and count as unbudgeted"""
+    user_data = st.session_state.user_data
+    user_data['categories'].remove(name)
+    del user_data['category_budgets'][name]
+    del user_data['category_frequencies'][name]
+    user_data.get('category_rollover', {}).pop(name, None)
+
+def category_command(label, before, after, position=None):
+    """Command turning category settings before into after; None stands for no category"""
+    def change(old, new):
+        if new is None:
+            delete_category(old[0])
+        else:
+            set_category(old[0] if old else new[0], new, position)
+    
+    return Command(label, lambda: change(before, after), lambda: change(after, before))
+
+def category_edit_command(label, name, settings):
+    """Command applying new settings to a budget category
+    
+    Renaming onto a name the dictionary already has merges the category's
+    transactions into that name's code, and undo moves them back.
+    """
+    command = category_command(label, category_settings(name), settings)
+    categories = st.session_state.category_dictionary
+    old_code, new_code = categories.lookup(name), categories.lookup(settings[0])
+    if old_code is None or new_code is None or old_code == new_code:
+        return command
+    
+    moved = [transaction for transaction in st.session_state.expenses if transaction.category_code == old_code]
+    merge = transactions_command(label, added=[replace(transaction, category_code=new_code) for transaction in moved],
+                                 deleted=moved)
+    
+    def apply():
+        command.apply()
+        merge.apply()
+    
+    def revert():
+        merge.revert()
+        command.revert()
+    
+    return Command(label, apply, revert)
+
 def manage_categories_section():
     """Allow users to add, edit, or remove budget categories"""
     st.header("📋 Manage Budget Categories")
@@ -595,16 +950,16 @@ def manage_categories_section():
         with col2:
             new_budget = st.number_input("Budget Amount ($):", min_value=0.0, step=0.01)
         with col3:
-            new_frequency = st.selectbox("Frequency:", ["Monthly", "Weekly"])
+            new_frequency = st.selectbox("Frequency:", BUDGET_FREQUENCIES,
+                                         help="Pay Period budgets reset on each payday")
         
         if st.form_submit_button("Add Category", type="primary"):
             if new_category.strip() and new_budget > 0:
                 if new_category.strip() not in user_data['categories']:
-                    st.session_state.user_data['categories'].append(new_category.strip())
-                    st.session_state.user_data['category_budgets'][new_category.strip()] = new_budget
-                    st.session_state.user_data['category_frequencies'][new_category.strip()] = new_frequency
-                    st.success(f"Added {new_category.strip()}: ${new_budget:.2f} {new_frequency.lower()}")
-                    st.rerun()
+                    run_command(category_command(
+                        f"add category {new_category.strip()}", None,
+                        (new_category.strip(), to_cents(new_budget), new_frequency, None)
+                    ), f"Added {new_category.strip()}: ${new_budget:.2f} {new_frequency.lower()}")
                 else:
                     st.error("Category already exists!")
             else:
@@ -612,9 +967,7 @@ def manage_categories_section():
     
     st.subheader("✏️ Edit Existing Categories")
     
-    categories_to_remove = []
-    
-    for cat in user_data['categories']:
+    for position, cat in enumerate(user_data['categories']):
         with st.expander(f"📝 {cat}"):
             col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
             
@@ -622,40 +975,74 @@ def manage_categories_section():
                 new_name = st.text_input("Category Name:", value=cat, key=f"edit_name_{cat}")
             with col2:
                 new_budget = st.number_input("Budget ($):", 
-                                           value=float(user_data['category_budgets'][cat]),
+                                           value=dollars(user_data['category_budgets'][cat]),
                                            min_value=0.0, step=0.01, key=f"edit_budget_{cat}")
             with col3:
                 current_freq = user_data['category_frequencies'][cat]
-                new_freq = st.selectbox("Frequency:", ["Monthly", "Weekly"], 
-                                      index=0 if current_freq == "Monthly" else 1,
+                new_freq = st.selectbox("Frequency:", BUDGET_FREQUENCIES, 
+                                      index=BUDGET_FREQUENCIES.index(current_freq),
                                       key=f"edit_freq_{cat}")
+            rollover_since = user_data.get('category_rollover', {}).get(cat)
+            col5, col6 = st.columns([1, 1])
+            with col5:
+                rollover = st.checkbox("Roll over unspent budget", value=rollover_since is not None,
+                                       key=f"edit_rollover_{cat}",
+                                       help="Carry what's left (or overspent) into the next period")
+            with col6:
+                rollover_start = st.date_input(
+                    "Carry balances since:",
+                    value=date.fromisoformat((rollover_since or user_data['setup_date'])[:10]),
+                    key=f"edit_rollover_start_{cat}", disabled=not rollover
+                )
             with col4:
                 st.write("")
                 if st.button("💾 Update", key=f"update_{cat}"):
                     if new_name.strip() and new_budget > 0:
-                        if new_name.strip() != cat:
-                            categories_to_remove.append(cat)
-                            st.session_state.user_data['categories'].append(new_name.strip())
-                        
-                        st.session_state.user_data['category_budgets'][new_name.strip()] = new_budget
-                        st.session_state.user_data['category_frequencies'][new_name.strip()] = new_freq
-                        st.success(f"Updated {new_name.strip()}")
-                        st.rerun()
+                        settings = (new_name.strip(), to_cents(new_budget), new_freq,
+                                    rollover_start.isoformat() if rollover else None)
+                        if settings != category_settings(cat):
+                            try:
+                                run_command(category_edit_command(f"edit category {cat}", cat, settings),
+                                            f"Updated {new_name.strip()}")
+                            except ValueError as e:
+                                st.error(str(e))
                 
                 if st.button("❌ Remove", key=f"remove_{cat}"):
-                    categories_to_remove.append(cat)
-                    st.rerun()
-    
-    for cat in categories_to_remove:
-        if cat in st.session_state.user_data['categories']:
-            st.session_state.user_data['categories'].remove(cat)
-            del st.session_state.user_data['category_budgets'][cat]
-            del st.session_state.user_data['category_frequencies'][cat]
+                    # Undo puts the category back in the same place, with its budget and settings
+                    run_command(category_command(f"remove category {cat}", category_settings(cat), None, position),
+                                f"Removed {cat}")
     
     if st.button("✅ Done Managing Categories"):
         st.session_state.show_category_management = False
         st.rerun()
 
+def goal_command(label, added=None, deleted=None):
+    """Command adding or deleting a savings goal; undo does the reverse"""
+    def change(to_remove, to_add):
+        goals = st.session_state.savings_goals
+        if to_remove is not None:
+            goals.remove(to_remove.id)
+        if to_add is not None:
+            goals.add(to_add)
+    
+    return Command(label, lambda: change(deleted, added), lambda: change(added, deleted))
+
+def goal_update_command(label, goal, contribution, priority):
+    """Command recording a contribution (if any) and setting a goal's priority"""
+    old_priority = goal.priority
+    
+    def apply():
+        if contribution is not None:
+            goal.add_contribution(contribution)
+        goal.priority = priority
+    
+    def revert():
+        if contribution is not None:
+            goal.remove_last_contribution(contribution)
+        goal.priority = old_priority
+    
+    return Command(label, apply, revert)
+
 def manage_savings_goals():
     """Manage savings goals interface"""
     st.header("🎯 Savings Goals")
@@ -675,61 +1062,87 @@ def manage_savings_goals():
         
         if st.form_submit_button("Add Goal", type="primary"):
             if goal_name.strip() and target_amount > 0:
-                new_goal = {
-                    'id': len(st.session_state.savings_goals),
-                    'name': goal_name.strip(),
-                    'target_amount': target_amount,
-                    'current_amount': current_amount,
-                    'description': goal_description,
-                    'created_date': datetime.now().isoformat(),
-                    'completed': False
-                }
-                st.session_state.savings_goals.append(new_goal)
-                st.success(f"Added savings goal: {goal_name}")
-                st.rerun()
+                new_goal = SavingsGoal(
+                    id=st.session_state.savings_goals.new_id(),
+                    name=goal_name.strip(),
+                    target_cents=to_cents(target_amount),
+                    current_cents=to_cents(current_amount),
+                    description=goal_description,
+                    created_date=datetime.now().isoformat(),
+                    completed=False,
+                    priority=max((goal.priority for goal in st.session_state.savings_goals), default=0) + 1
+                )
+                run_command(goal_command(f"add goal {new_goal.name}", added=new_goal),
+                            f"Added savings goal: {goal_name}")
             else:
                 st.error("Please enter a goal name and target amount.")
     
     if st.session_state.savings_goals:
         st.subheader("📈 Your Savings Goals")
         
-        for i, goal in enumerate(st.session_state.savings_goals):
-            with st.expander(f"🎯 {goal['name']} - ${goal['current_amount']:,.0f} / ${goal['target_amount']:,.0f}"):
-                progress = min(goal['current_amount'] / goal['target_amount'], 1.0)
+        goals = st.session_state.savings_goals
+        today = today_ordinal()
+        paces = contribution_rates(goals, today)
+        forecasts = days_to_complete(remaining_cents(goals), paces)
+        
+        # Widgets are keyed by goal id, so they stay with their goal when another is deleted
+        for i, goal in enumerate(goals):
+            with st.expander(f"🎯 {goal.name} - ${goal.current_amount:,.0f} / ${goal.target_amount:,.0f}"):
+                progress = goal.progress
                 
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
                     st.progress(progress)
-                    remaining = goal['target_amount'] - goal['current_amount']
+                    remaining = dollars(goal.target_cents - goal.current_cents)
                     
                     if remaining <= 0:
                         st.success("🎉 Goal Completed!")
-                        goal['completed'] = True
+                        goal.completed = True
                     else:
                         st.write(f"Remaining: ${remaining:,.2f} ({progress*100:.1f}% complete)")
                     
-                    if goal['description']:
-                        st.write(f"*{goal['description']}*")
+                    if goal.description:
+                        st.write(f"*{goal.description}*")
+                    
+                    if remaining > 0:
+                        monthly_pace = dollars(paces[i] * DAYS_PER_MONTH)
+                        if forecasts[i] < float('inf'):
+                            eta = date_from_ordinal(today + int(forecasts[i]))
+                            st.caption(f"At your recent pace (${monthly_pace:,.2f}/month) you'll reach this goal "
+                                       f"around {eta:%B %d, %Y}.")
+                        else:
+                            st.caption(f"No net contributions in the last {RATE_WINDOW_DAYS} days, so there's "
+                                       "no completion forecast yet.")
+                    if goal.contributions:
+                        last = goal.contributions[-1]
+                        st.caption(f"{len(goal.contributions)} contributions, most recently "
+                                   f"${dollars(last.amount_cents):,.2f} on {format_timestamp(last.timestamp)[:10]}")
                 
                 with col2:
                     new_amount = st.number_input(f"Update Amount:", 
-                                               value=float(goal['current_amount']),
+                                               value=goal.current_amount,
                                                min_value=0.0, step=10.0, 
-                                               key=f"goal_update_{i}")
+                                               key=f"goal_update_{goal.id}")
+                    new_priority = st.number_input("Priority:", value=goal.priority, min_value=0, step=1,
+                                                   key=f"goal_priority_{goal.id}",
+                                                   help="Lower numbers are funded first from your surplus")
                     
-                    if st.button("💾 Update", key=f"update_goal_{i}"):
-                        st.session_state.savings_goals[i]['current_amount'] = new_amount
-                        st.success("Goal updated!")
-                        st.rerun()
+                    if st.button("💾 Update", key=f"update_goal_{goal.id}"):
+                        # The change is recorded as a contribution, so the history is kept
+                        change = to_cents(new_amount) - goal.current_cents
+                        contribution = GoalContribution(timestamp_from_datetime(datetime.now()), change) if change else None
+                        if contribution is not None or int(new_priority) != goal.priority:
+                            run_command(
+                                goal_update_command(f"update goal {goal.name}", goal, contribution, int(new_priority)),
+                                "Goal updated!"
+                            )
                     
-                    if st.button("❌ Delete", key=f"delete_goal_{i}"):
-                        st.session_state.savings_goals.pop(i)
-                        st.success("Goal deleted!")
-                        st.rerun()
+                    if st.button("❌ Delete", key=f"delete_goal_{goal.id}"):
+                        run_command(goal_command(f"delete goal {goal.name}", deleted=goal), "Goal deleted!")
         
-        total_target = sum(goal['target_amount'] for goal in st.session_state.savings_goals)
-        total_current = sum(goal['current_amount'] for goal in st.session_state.savings_goals)
+        total_target = dollars(sum(goal.target_cents for goal in st.session_state.savings_goals))
+        total_current = dollars(sum(goal.current_cents for goal in st.session_state.savings_goals))
         
         st.subheader("💰 Savings Summary")
         col1, col2, col3 = st.columns(3)
@@ -741,17 +1154,146 @@ def manage_savings_goals():
         with col3:
             remaining = total_target - total_current
             st.metric("Remaining to Save", f"${remaining:,.2f}")
+        
+        surplus_allocation_section(goals, paces, forecasts)
     
     if st.button("✅ Close Savings Goals"):
         st.session_state.show_savings_goals = False
         st.rerun()
 
+@instrumented("surplus_allocation")
+def surplus_allocation_section(goals, paces, forecasts):
+    """Split this month's surplus across goals by priority and forecast each goal as it cascades"""
+    st.subheader("🧮 Surplus Allocation")
+    
+    surplus = st.number_input("Monthly surplus to put towards goals ($):", min_value=0.0, step=50.0,
+                              value=max(dollars(monthly_surplus_cents()), 0.0), key="goal_surplus",
+                              help="Defaults to your monthly income minus your monthly budgets")
+    allocation = allocate_surplus(goals, to_cents(surplus))
+    remaining = remaining_cents(goals)
+    # Lower-priority goals are funded once the ones ahead of them are reached
+    with_allocation = days_to_complete_with_surplus(goals, to_cents(surplus))
+    today = today_ordinal()
+    
+    def forecast(days):
+        if days == 0:
+            return "Reached"
+        return f"{date_from_ordinal(today + int(days)):%b %Y}" if days < float('inf') else "—"
+    
+    st.dataframe([
+        {
+            'Goal': goal.name,
+            'Priority': goal.priority,
+            'Remaining': dollars(int(remaining[i])),
+            'Recent Pace / Month': round(dollars(paces[i] * DAYS_PER_MONTH), 2),
+            'Forecast at Pace': forecast(forecasts[i]),
+            'Allocated This Month': dollars(int(allocation[i])),
+            'Forecast with Surplus': forecast(with_allocation[i]),
+        }
+        for i, goal in sorted(enumerate(goals), key=lambda item: (item[1].priority, item[1].id))
+    ], use_container_width=True, hide_index=True)
+    
+    unallocated = to_cents(surplus) - int(allocation.sum())
+    if unallocated > 0:
+        st.caption(f"${dollars(unallocated):,.2f}/month is left over once every goal is funded.")
+
+@instrumented("balance_history", rows=ledger_rows)
+def balance_history_section():
+    """Actual balance over the whole transaction history, daily or weekly"""
+    import numpy as np
+    import pandas as pd
+    
+    st.subheader("📉 Balance History")
+    ledger = st.session_state.balance_ledger
+    if not ledger.transactions:
+        st.info("Your balance history will appear once you have transactions.")
+        return
+    
+    resolution = st.radio("Resolution:", ["Daily", "Weekly"], horizontal=True, key="balance_history_resolution")
+    
+    def build_history():
+        first_day = ledger.transactions[0].day
+        last_day = max(today_ordinal(), ledger.transactions[-1].day)
+        if resolution == "Weekly":
+            # Balance at the end of each Monday-Sunday week
+            days, balances = ledger.balance_series(week_start(week_ordinal(first_day)) + 6,
+                                                   week_start(week_ordinal(last_day)) + 6, step_days=7)
+        else:
+            days, balances = ledger.balance_series(first_day, last_day)
+        return pd.DataFrame({
+            'Date': np.datetime64('1970-01-01', 'D') + days.astype('timedelta64[D]'),
+            'Balance': dollars(balances),
+        }).set_index('Date')
+    
+    # Multi-year histories are reduced to each bucket's low and high before charting
+    render_line_chart(f"balance_history_{resolution}", chart_data_version(), build_history)
+
+def get_category_month_matrix():
+    """Category x budget-month spending, rebuilt only when the ledger, categories or periods change"""
+    key = (
+        st.session_state.balance_ledger.version,
+        len(st.session_state.category_dictionary),
+        st.session_state.get('budget_period_settings'),
+        st.session_state.current_month_year,
+    )
+    cached = st.session_state.get('_category_month_matrix')
+    if cached is None or cached[0] != key:
+        with timed_section("category_month_matrix", ledger_rows):
+            matrix = CategoryMonthMatrix(st.session_state.expenses, len(st.session_state.category_dictionary),
+                                         parse_month_label(st.session_state.current_month_year))
+        cached = st.session_state._category_month_matrix = (key, matrix)
+    return cached[1]
+
+@instrumented("comparisons")
+def comparison_reports_section():
+    """Per-category spending in one run of budget months against another"""
+    st.subheader("📅 Period Comparisons")
+    
+    report = st.selectbox("Compare:", REPORTS, key="comparison_report")
+    current_range, previous_range, current_label, previous_label = comparison_ranges(
+        report, parse_month_label(st.session_state.current_month_year)
+    )
+    matrix = get_category_month_matrix()
+    current, previous = matrix.totals(*current_range), matrix.totals(*previous_range)
+    
+    current_total, previous_total = dollars(int(current.sum())), dollars(int(previous.sum()))
+    change = current_total - previous_total
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(current_label, f"${current_total:,.2f}")
+    with col2:
+        st.metric(previous_label, f"${previous_total:,.2f}")
+    with col3:
+        st.metric("Change", f"${change:,.2f}" if change >= 0 else f"-${abs(change):,.2f}",
+                  delta=f"{change / previous_total * 100:+.1f}%" if previous_total else None, delta_color="inverse")
+    
+    categories = st.session_state.category_dictionary
+    rows = [
+        {
+            'Category': categories.name(code),
+            current_label: dollars(int(current[code])),
+            previous_label: dollars(int(previous[code])),
+            'Change ($)': dollars(int(current[code] - previous[code])),
+            'Change (%)': round((current[code] - previous[code]) / previous[code] * 100, 1) if previous[code] else None,
+        }
+        for code in range(len(categories))
+        if current[code] or previous[code]
+    ]
+    if rows:
+        rows.sort(key=lambda row: abs(row['Change ($)']), reverse=True)
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No spending in either period yet.")
+
+@instrumented("analytics", rows=ledger_rows)
 def analytics_section():
     """Advanced analytics and visualizations"""
+    import pandas as pd
+    
     st.header("📊 Budget Analytics & Projections")
     
     user_data = st.session_state.user_data
-    actual_expenses = [e for e in st.session_state.expenses if e['amount'] > 0]
+    actual_expenses = [e for e in st.session_state.expenses if e.amount_cents > 0]
     
     if not actual_expenses:
         st.info("Add some expenses to see analytics and projections!")
@@ -760,48 +1302,54 @@ def analytics_section():
             st.rerun()
         return
     
+    # Projections are estimates, so they work in float dollars
+    income_amount = dollars(user_data['income_amount'])
     if user_data['income_frequency'] == "Weekly":
-        monthly_income = user_data['income_amount'] * 4.33
+        monthly_income = income_amount * 4.33
     elif user_data['income_frequency'] == "Fortnightly":
-        monthly_income = user_data['income_amount'] * 2.167
+        monthly_income = income_amount * 2.167
     else:
-        monthly_income = user_data['income_amount']
+        monthly_income = income_amount
     
-    category_spending = {}
-    for expense in actual_expenses:
-        cat = expense['category']
-        category_spending[cat] = category_spending.get(cat, 0) + expense['amount']
+    category_cents = st.session_state.category_dictionary.by_name(
+        st.session_state.category_dictionary.totals(
+            (expense.category_code, expense.amount_cents) for expense in actual_expenses
+        )
+    )
+    category_spending = {cat: dollars(cents) for cat, cents in category_cents.items()}
+    data_version = chart_data_version()
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("💰 Spending by Category")
         if category_spending:
-            chart_data = pd.DataFrame({
+            render_bar_chart("category_spending", data_version, lambda: pd.DataFrame({
                 'Category': list(category_spending.keys()),
                 'Spent': list(category_spending.values())
-            })
-            st.bar_chart(chart_data.set_index('Category'))
+            }).set_index('Category'))
     
     with col2:
         st.subheader("📈 Budget vs Reality")
-        budget_vs_actual = []
-        for cat in user_data['categories']:
-            budget = user_data['category_budgets'][cat]
-            spent = category_spending.get(cat, 0)
-            budget_vs_actual.append({
-                'Category': cat,
-                'Budget': budget,
-                'Spent': spent,
-                'Remaining': budget - spent
-            })
         
-        comparison_df = pd.DataFrame(budget_vs_actual)
-        st.bar_chart(comparison_df.set_index('Category')[['Budget', 'Spent']])
+        def build_comparison():
+            budget_vs_actual = []
+            for cat in user_data['categories']:
+                budget = dollars(user_data['category_budgets'][cat])
+                spent = category_spending.get(cat, 0)
+                budget_vs_actual.append({
+                    'Category': cat,
+                    'Budget': budget,
+                    'Spent': spent,
+                    'Remaining': budget - spent
+                })
+            return pd.DataFrame(budget_vs_actual).set_index('Category')[['Budget', 'Spent']]
+        
+        render_bar_chart("budget_vs_actual", data_version, build_comparison)
     
     st.subheader("🔮 Monthly Projections")
     
-    total_spent = sum(category_spending.values())
+    total_spent = dollars(sum(category_cents.values()))
     days_in_month = 30
     current_day = datetime.now().day
     
@@ -828,17 +1376,17 @@ def analytics_section():
         
         days = list(range(1, 31))
         projected_balance = []
-        running_balance = user_data['current_balance']
+        running_balance = dollars(current_balance())
         
         for day in days:
             if user_data['income_frequency'] == "Monthly" and day == user_data['payment_day']:
-                running_balance += user_data['income_amount']
+                running_balance += income_amount
             elif user_data['income_frequency'] == "Weekly":
                 if day % 7 == (user_data['payment_day'] if isinstance(user_data['payment_day'], int) else 1):
-                    running_balance += user_data['income_amount']
+                    running_balance += income_amount
             elif user_data['income_frequency'] == "Fortnightly":
                 if day % 14 == (user_data['payment_day'] if isinstance(user_data['payment_day'], int) else 1):
-                    running_balance += user_data['income_amount']
+                    running_balance += income_amount
             
             if day <= current_day:
                 daily_spent = (total_spent / current_day) if current_day > 0 else 0
@@ -848,12 +1396,13 @@ def analytics_section():
             running_balance -= daily_spent
             projected_balance.append(running_balance)
         
-        balance_df = pd.DataFrame({
+        render_line_chart("balance_projection", data_version, lambda: pd.DataFrame({
             'Day': days,
             'Projected Balance': projected_balance
-        })
+        }).set_index('Day'))
         
-        st.line_chart(balance_df.set_index('Day'))
+        balance_history_section()
+        comparison_reports_section()
         
         st.subheader("💡 Insights")
         
@@ -887,7 +1436,7 @@ def user_setup_wizard():
     
     col1, col2 = st.columns(2)
     with col1:
-        current_balance = st.number_input("Current Bank Balance ($):", min_value=0.0, step=0.01)
+        opening_balance = st.number_input("Current Bank Balance ($):", min_value=0.0, step=0.01)
     with col2:
         income_amount = st.number_input("Income Amount ($):", min_value=0.0, step=0.01)
     
@@ -916,7 +1465,8 @@ def user_setup_wizard():
         with col2:
             new_amount = st.number_input("Budget ($):", min_value=0.0, step=0.01, key="new_amount_input")
         with col3:
-            new_frequency = st.selectbox("Frequency:", ["Monthly", "Weekly"], key="new_frequency_input")
+            new_frequency = st.selectbox("Frequency:", BUDGET_FREQUENCIES, key="new_frequency_input",
+                                         help="Pay Period budgets reset on each payday")
         with col4:
             st.write("")
             if st.button("Add Category", type="primary"):
@@ -941,12 +1491,8 @@ def user_setup_wizard():
             amount = st.session_state.setup_category_budgets[cat]
             frequency = st.session_state.setup_category_frequencies[cat]
             
-            if frequency == "Weekly":
-                monthly_equiv = amount * 4.33
-                total_monthly_budget += monthly_equiv
-            else:
-                monthly_equiv = amount
-                total_monthly_budget += amount
+            monthly_equiv = monthly_budget_equivalent(amount, frequency, income_frequency)
+            total_monthly_budget += monthly_equiv
             
             col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
             
@@ -955,7 +1501,7 @@ def user_setup_wizard():
             with col2:
                 st.write(f"${amount:.2f} {frequency.lower()}")
             with col3:
-                if frequency == "Weekly":
+                if frequency != "Monthly":
                     st.write(f"(~${monthly_equiv:.2f}/month)")
                 else:
                     st.write(f"(${monthly_equiv:.2f}/month)")
@@ -988,17 +1534,22 @@ def user_setup_wizard():
     
     st.write("---")
     if st.button("Complete Setup 🎯", type="primary", disabled=len(st.session_state.setup_categories) == 0):
-        if current_balance >= 0 and income_amount > 0 and st.session_state.setup_categories:
+        if opening_balance >= 0 and income_amount > 0 and st.session_state.setup_categories:
+            # Money is stored as integer cents from here on
             st.session_state.user_data = {
-                'current_balance': current_balance,
-                'income_amount': income_amount,
+                'income_amount': to_cents(income_amount),
                 'income_frequency': income_frequency,
                 'payment_day': payment_day,
                 'categories': st.session_state.setup_categories.copy(),
-                'category_budgets': st.session_state.setup_category_budgets.copy(),
+                'category_budgets': {
+                    cat: to_cents(amount) for cat, amount in st.session_state.setup_category_budgets.items()
+                },
                 'category_frequencies': st.session_state.setup_category_frequencies.copy(),
+                'category_rollover': {},
                 'setup_date': datetime.now().isoformat()
             }
+            # The balance is derived from here on: opening balance minus every transaction
+            st.session_state.balance_ledger = BalanceLedger(to_cents(opening_balance), st.session_state.expenses)
             st.session_state.user_setup_complete = True
             st.session_state.last_updated = datetime.now().date()
             
@@ -1015,15 +1566,773 @@ def user_setup_wizard():
     if len(st.session_state.setup_categories) == 0:
         st.info("💡 Add at least one budget category to complete setup.")
 
+@instrumented(rows=ledger_rows)
+def import_budget_data(uploaded_file):
+    """Load user settings, transactions and savings goals from an exported CSV"""
+    import pandas as pd
+    
+    df = pd.read_csv(uploaded_file)
+    
+    user_settings = df[df['data_type'] == 'user_settings'].iloc[0]
+    
+    categories = user_settings['categories'].split('|') if pd.notna(user_settings['categories']) else []
+    category_budgets = {}
+    category_frequencies = {}
+    
+    if pd.notna(user_settings['category_budgets']):
+        for item in user_settings['category_budgets'].split('|'):
+            if ':' in item:
+                k, v = item.split(':', 1)
+                category_budgets[k] = to_cents(v)
+    
+    if pd.notna(user_settings['category_frequencies']):
+        for item in user_settings['category_frequencies'].split('|'):
+            if ':' in item:
+                k, v = item.split(':', 1)
+                category_frequencies[k] = v
+    
+    # Exports before envelope budgeting have no rollover column
+    category_rollover = {}
+    rollover_value = user_settings.get('category_rollover')
+    if rollover_value is not None and pd.notna(rollover_value):
+        for item in rollover_value.split('|'):
+            if ':' in item:
+                k, v = item.split(':', 1)
+                category_rollover[k] = v
+    
+    payment_day_value = user_settings['payment_day']
+    if isinstance(payment_day_value, (int, float)) or (isinstance(payment_day_value, str) and payment_day_value.replace('.', '').isdigit()):
+        payment_day = int(float(payment_day_value))
+    else:
+        payment_day = str(payment_day_value)
+    
+    base = user_settings.get('base_currency')
+    # Everything is built locally and only stored once the whole file has
+    # parsed, so a bad row leaves the current session untouched
+    user_data = {
+        'income_amount': to_cents(float(user_settings['income_amount'])),
+        'income_frequency': user_settings['income_frequency'],
+        'payment_day': payment_day,
+        'setup_date': user_settings['setup_date'],
+        'monthly_reset_day': int(user_settings.get('monthly_reset_day', 1)),
+        'base_currency': str(base) if pd.notna(base) else DEFAULT_BASE_CURRENCY,
+        'categories': categories,
+        'category_budgets': category_budgets,
+        'category_frequencies': category_frequencies,
+        'category_rollover': category_rollover
+    }
+    # The pay schedule is derived from these when budget periods are stamped below
+    setup_day = day_ordinal(datetime.fromisoformat(user_data['setup_date']))
+    if user_data['income_frequency'] != "Monthly":
+        pay_anchor_day(payment_day, setup_day)
+    
+    # Restore current month year if available
+    if 'current_month_year' in user_settings and pd.notna(user_settings['current_month_year']):
+        current_month_year = user_settings['current_month_year']
+    else:
+        # Default to current month if not in saved data
+        today = datetime.now()
+        current_month_year = f"{today.year}-{today.month:02d}"
+    
+    expenses_data = df[df['data_type'] == 'expense']
+    expenses_data = expenses_data[expenses_data['date'].notna() & expenses_data['category'].notna()]
+    
+    # Budget categories get the first codes; other names seen in the ledger follow
+    category_dictionary = CategoryDictionary(categories)
+    
+    # Exports before multi-currency support have no currency columns; amount is
+    # always the base-currency value, so foreign rows load without a rate table
+    no_currency = [None] * len(expenses_data)
+    currencies = expenses_data['currency'] if 'currency' in expenses_data.columns else no_currency
+    originals = expenses_data['original_amount'] if 'original_amount' in expenses_data.columns else no_currency
+    split_ids = expenses_data['split_id'] if 'split_id' in expenses_data.columns else no_currency
+    
+    # Records validate themselves, so a malformed row fails the import here
+    expenses = [
+        transaction_from_row(
+            category_dictionary,
+            str(date_text),
+            str(category),
+            to_cents(float(amount)) if pd.notna(amount) else 0,
+            str(description) if pd.notna(description) else '',
+            str(frequency) if pd.notna(frequency) else 'Monthly',
+            str(currency) if pd.notna(currency) else '',
+            to_cents(float(original)) if pd.notna(currency) and pd.notna(original) else 0,
+            int(float(split_id)) if pd.notna(split_id) else 0
+        )
+        for date_text, category, amount, description, frequency, currency, original, split_id in zip(
+            expenses_data['date'], expenses_data['category'], expenses_data['amount'],
+            expenses_data['description'], expenses_data['frequency'], currencies, originals, split_ids
+        )
+    ]
+    
+    # Exports record the opening balance too; the stored current balance is then
+    # only a consistency check on the derived one
+    closing_cents = to_cents(float(user_settings['current_balance']))
+    opening_balance = user_settings.get('opening_balance')
+    balance_check = None
+    if opening_balance is not None and pd.notna(opening_balance):
+        ledger = BalanceLedger(to_cents(float(opening_balance)), expenses)
+        if ledger.balance_cents != closing_cents:
+            balance_check = {'stored': closing_cents, 'derived': ledger.balance_cents}
+    else:
+        ledger = BalanceLedger.from_closing_balance(closing_cents, expenses)
+    
+    savings_data = df[df['data_type'] == 'savings_goal']
+    next_goal_id = user_settings.get('next_goal_id')
+    goals = GoalMap(next_id=int(float(next_goal_id)) if next_goal_id is not None and pd.notna(next_goal_id) else 0)
+    
+    for _, goal in savings_data.iterrows():
+        if pd.notna(goal.get('name')):
+            description = goal.get('description', '')
+            created_date = goal.get('created_date', '')
+            priority = goal.get('priority')
+            goal_id = int(float(goal.get('id', 0)))
+            # Older exports numbered goals by list length, which can repeat after a delete
+            if goal_id in goals:
+                goal_id = goals.new_id()
+            goals.add(SavingsGoal(
+                id=goal_id,
+                name=str(goal['name']),
+                target_cents=to_cents(float(goal.get('target_amount', 0))),
+                current_cents=to_cents(float(goal.get('current_amount', 0))),
+                description=str(description) if pd.notna(description) else '',
+                created_date=str(created_date) if pd.notna(created_date) else datetime.now().isoformat(),
+                # CSV round-trips booleans as text when the column also holds blanks
+                completed=str(goal.get('completed', False)).strip().lower() in ('true', '1', '1.0'),
+                # Exports before priorities existed keep their goals in list order
+                priority=int(float(priority)) if priority is not None and pd.notna(priority)
+                else len(goals) + 1
+            ))
+    
+    # current_amount already includes the contributions, so they are only attached as history
+    contributions_data = df[df['data_type'] == 'goal_contribution']
+    for goal_id, date_text, amount in zip(contributions_data.get('id', []), contributions_data.get('date', []),
+                                          contributions_data.get('amount', [])):
+        goal = goals.get(int(goal_id)) if pd.notna(goal_id) else None
+        if goal is not None and pd.notna(amount):
+            goal.contributions.append(GoalContribution(parse_timestamp(str(date_text)), to_cents(float(amount))))
+    for goal in goals:
+        goal.contributions.sort(key=lambda contribution: contribution.timestamp)
+    
+    st.session_state.user_data = user_data
+    st.session_state.current_month_year = current_month_year
+    st.session_state.category_dictionary = category_dictionary
+    st.session_state.expenses = expenses
+    st.session_state.next_split_id = max((transaction.split_id for transaction in expenses), default=0) + 1
+    st.session_state.balance_ledger = ledger
+    if balance_check is not None:
+        st.session_state.balance_check = balance_check
+    st.session_state.savings_goals = goals
+    recompute_budget_periods()
+    get_anomaly_detector()
+    # Commands refer to the records they changed, which a load replaces
+    st.session_state.command_log.clear()
+    st.session_state.user_setup_complete = True
+    st.session_state.last_updated = datetime.now().date()
+
+@instrumented(rows=ledger_rows)
+def export_budget_data():
+    """Serialize user settings, transactions and savings goals to CSV text"""
+    import pandas as pd
+    
+    user_data = st.session_state.user_data
+    
+    user_data_df = pd.DataFrame([{
+        'data_type': 'user_settings',
+        'opening_balance': format_cents(st.session_state.balance_ledger.opening_cents),
+        'current_balance': format_cents(current_balance()),
+        'income_amount': format_cents(user_data['income_amount']),
+        'income_frequency': user_data['income_frequency'],
+        'payment_day': str(user_data['payment_day']),
+        'setup_date': user_data['setup_date'],
+        'monthly_reset_day': user_data.get('monthly_reset_day', 1),
+        'base_currency': base_currency(),
+        'next_goal_id': st.session_state.savings_goals.next_id,
+        'current_month_year': st.session_state.current_month_year,
+        'categories': '|'.join(user_data['categories']),
+        'category_budgets': '|'.join([f"{k}:{format_cents(v)}" for k, v in user_data['category_budgets'].items()]),
+        'category_frequencies': '|'.join([f"{k}:{v}" for k, v in user_data['category_frequencies'].items()]),
+        'category_rollover': '|'.join([f"{k}:{v}" for k, v in user_data.get('category_rollover', {}).items()])
+    }])
+    
+    # Budget periods are derived from the date, so to_row() doesn't persist them
+    category_dictionary = st.session_state.category_dictionary
+    expenses_df = pd.DataFrame([transaction.to_row(category_dictionary) for transaction in st.session_state.expenses],
+                               columns=TRANSACTION_COLUMNS)
+    expenses_df['data_type'] = 'expense'
+    
+    savings_df = pd.DataFrame([goal.to_row() for goal in st.session_state.savings_goals],
+                              columns=SAVINGS_GOAL_COLUMNS)
+    savings_df['data_type'] = 'savings_goal'
+    
+    contributions_df = pd.DataFrame([contribution.to_row(goal.id)
+                                     for goal in st.session_state.savings_goals
+                                     for contribution in goal.contributions],
+                                    columns=GOAL_CONTRIBUTION_COLUMNS)
+    contributions_df['data_type'] = 'goal_contribution'
+    
+    # Empty frames are left out of the concat (pandas is deprecating their effect on
+    # the combined dtypes) but still contribute their columns to the header
+    frames = [user_data_df, expenses_df, savings_df, contributions_df]
+    columns = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+    combined_df = pd.concat([frame for frame in frames if not frame.empty], ignore_index=True,
+                            sort=False).reindex(columns=columns)
+    
+    return combined_df.to_csv(index=False)
+
+# Streamlit 1.29 has no fragments, so every interaction reruns the page; only
+# the visible section computes its data
+DASHBOARD_SECTIONS = [
+    "💳 Add Expense",
+    "⚡ Spending Velocity",
+    "📋 Transactions",
+    "🔍 Search",
+    "🚨 Unusual Spending",
+    "💰 Budget Progress",
+    "🎯 Savings Progress",
+]
+
+MAX_SPLIT_LINES = 5
+
+def add_expense_section():
+    """Expense entry form; inputs don't trigger reruns until the form is submitted"""
+    user_data = st.session_state.user_data
+    
+    st.header("💳 Add New Expense")
+    
+    for flag in st.session_state.pop('new_anomaly_flags', []):
+        st.warning(f"🚨 {describe_anomaly(flag)}")
+    
+    # Other currencies can be chosen once an exchange rate file has been loaded
+    rate_table = st.session_state.get('rate_table')
+    currencies = [base_currency()] + (rate_table.currencies() if rate_table is not None else [])
+    
+    # Outside the form, so the number of allocation lines updates as it changes
+    split_lines = st.number_input("Split across categories:", min_value=1, max_value=MAX_SPLIT_LINES, step=1,
+                                  key="expense_split_lines",
+                                  help="Enter one receipt that covers several budget categories")
+    
+    with st.form("add_expense_form", clear_on_submit=True):
+        expense_categories = user_data['categories'] + ["Other (No Budget)"]
+        lines = []
+        for line in range(split_lines):
+            col1, col2, col3 = st.columns(3)
+            # The first line keeps the keys the form had before splits existed
+            suffix = f"_{line}" if line else ""
+            
+            with col1:
+                line_category = st.selectbox("Category:", expense_categories,
+                                             key=f"expense_category{suffix}" if line else None)
+            with col2:
+                if line == 0 and len(currencies) > 1:
+                    amount_col, currency_col = st.columns([2, 1])
+                    with amount_col:
+                        line_amount = st.number_input("Amount:", min_value=0.0, step=0.01, key="expense_amount")
+                    with currency_col:
+                        expense_currency = st.selectbox("Currency:", currencies, key="expense_currency")
+                else:
+                    label = "Amount:" if len(currencies) > 1 else "Amount ($):"
+                    line_amount = st.number_input(label, min_value=0.0, step=0.01, key=f"expense_amount{suffix}")
+                    if line == 0:
+                        expense_currency = currencies[0]
+            if line == 0:
+                with col3:
+                    expense_description = st.text_input("Description (optional):", key="expense_desc")
+            lines.append((line_category, line_amount))
+        
+        submitted = st.form_submit_button("Add Expense", type="primary")
+    
+    if submitted:
+        lines = [(category, amount) for category, amount in lines if amount > 0]
+        if lines:
+            timestamp = timestamp_from_datetime(datetime.now())
+            original_cents = [to_cents(amount) for _, amount in lines]
+            foreign = expense_currency != base_currency()
+            amounts_cents = original_cents
+            if foreign:
+                amounts_cents = rate_table.convert([expense_currency] * len(lines),
+                                                   [timestamp // MINUTES_PER_DAY] * len(lines),
+                                                   original_cents).tolist()
+            # The allocations of a split purchase are stored as one row each, sharing a split id
+            split_id = new_split_id() if len(lines) > 1 else 0
+            expenses = []
+            for (expense_category, _), amount_cents, line_original_cents in zip(lines, amounts_cents, original_cents):
+                if expense_category == "Other (No Budget)":
+                    expense_frequency = "Monthly"
+                else:
+                    expense_frequency = user_data['category_frequencies'][expense_category]
+                
+                expenses.append(Expense(
+                    timestamp=timestamp,
+                    category_code=st.session_state.category_dictionary.code(expense_category),
+                    amount_cents=amount_cents,
+                    description=expense_description,
+                    frequency=expense_frequency,
+                    currency=expense_currency if foreign else '',
+                    original_cents=line_original_cents if foreign else 0,
+                    split_id=split_id
+                ))
+            
+            added = f"${dollars(sum(amounts_cents)):.2f}"
+            if foreign:
+                added = f"{dollars(sum(original_cents)):.2f} {expense_currency} ({added})"
+            categories_added = list(dict.fromkeys(category for category, _ in lines))
+            if len(lines) > 1:
+                message = f"Added {added} expense split across {', '.join(categories_added)}"
+            else:
+                message = f"Added {added} expense to {categories_added[0]}"
+            if "Other (No Budget)" in categories_added:
+                message += ". The Other (No Budget) amount won't count against any budget category."
+            
+            # The updated balance shows in the overview once the page reruns
+            run_command(
+                transactions_command(f"add {added} expense ({', '.join(categories_added)})", added=expenses),
+                message
+            )
+        else:
+            st.error("Please enter a valid amount")
+
+def describe_anomaly(flag):
+    """One-line explanation of an anomaly flag"""
+    category = st.session_state.category_dictionary.name(flag.category_code)
+    if flag.kind == SPIKE:
+        return (f"{category} spending this week (${dollars(flag.amount_cents):,.2f}) is well above "
+                f"a typical week (${dollars(flag.expected_cents):,.2f})")
+    return (f"${dollars(flag.amount_cents):,.2f} is unusually large for {category} "
+            f"(typically ${dollars(flag.expected_cents):,.2f})")
+
+@instrumented("anomalies")
+def anomalies_section():
+    """Recently flagged transactions and category spikes, from the detector's flag history"""
+    st.header("🚨 Unusual Spending")
+    
+    flags = get_anomaly_detector().recent_flags()
+    if not flags:
+        st.info("Nothing unusual so far. Expenses are checked against each category's history as you add them.")
+        return
+    
+    st.caption("Expenses far above their category's usual amount, and weeks where a category's "
+               "spending runs far above a typical week. Newest first.")
+    st.dataframe([
+        {
+            'Date': format_timestamp(flag.timestamp),
+            'Category': st.session_state.category_dictionary.name(flag.category_code),
+            'Type': "Category spike" if flag.kind == SPIKE else "Unusual expense",
+            'Amount': dollars(flag.amount_cents),
+            'Typical': dollars(flag.expected_cents),
+            'Spreads Above': round(flag.score, 1),
+            'Description': flag.transaction.description if flag.transaction is not None else '',
+        }
+        for flag in flags
+    ], use_container_width=True, hide_index=True)
+
+SEARCH_RESULT_LIMIT = 200
+SEARCH_PERIODS = [
+    "Any time",
+    "Last 7 days",
+    "Last 30 days",
+    "Last 90 days",
+    "This quarter",
+    "Year to date",
+    "Pay period to date",
+    "Custom range",
+]
+
+def period_day_range(period):
+    """(first_day, last_day) day ordinals of a named period ending today"""
+    today = today_ordinal()
+    if period.startswith("Last "):
+        return today - int(period.split()[1]) + 1, today
+    if period == "This quarter":
+        return quarter_start(today), today
+    if period == "Year to date":
+        return day_ordinal(date(date.today().year, 1, 1)), today
+    if period == "Pay period to date":
+        return pay_period_first_day(current_pay_period()), today
+    raise ValueError(f"Unknown period {period!r}")
+
+def search_section():
+    """Search every transaction by description or category, with period and amount filters"""
+    st.header("🔍 Search Transactions")
+    
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        query = st.text_input("Search:", placeholder="e.g. coffee, groc", key="search_query",
+                              help="Words match the start of description words or category names")
+    with col2:
+        period = st.selectbox("Period:", SEARCH_PERIODS, key="search_period")
+        if period == "Custom range":
+            date_range = st.date_input("Date range:", value=(), key="search_dates")
+        elif period == "Any time":
+            date_range = ()
+        else:
+            date_range = tuple(date_from_ordinal(day) for day in period_day_range(period))
+    with col3:
+        min_amount = st.number_input("Min ($):", min_value=0.0, step=1.0, value=None, key="search_min_amount")
+    with col4:
+        max_amount = st.number_input("Max ($):", min_value=0.0, step=1.0, value=None, key="search_max_amount")
+    
+    if not query.strip() and not date_range and min_amount is None and max_amount is None:
+        st.info("Type a search or set a filter to find transactions.")
+        return
+    
+    start_timestamp = day_ordinal(date_range[0]) * MINUTES_PER_DAY if date_range else None
+    end_timestamp = (day_ordinal(date_range[-1]) + 1) * MINUTES_PER_DAY - 1 if len(date_range) == 2 else None
+    
+    with timed_section("search"):
+        results = get_search_index().search(
+            query, st.session_state.category_dictionary,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            min_cents=to_cents(min_amount) if min_amount is not None else None,
+            max_cents=to_cents(max_amount) if max_amount is not None else None,
+        )
+    
+    if not results:
+        st.info("No transactions match.")
+        return
+    
+    spent_cents = sum(transaction.amount_cents for transaction in results if transaction.amount_cents > 0)
+    income_cents = spent_cents - sum(transaction.amount_cents for transaction in results)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Spent", f"${dollars(spent_cents):,.2f}")
+    col2.metric("Income", f"${dollars(income_cents):,.2f}")
+    net = dollars(income_cents - spent_cents)
+    col3.metric("Net", f"${net:,.2f}" if net >= 0 else f"-${abs(net):,.2f}")
+    
+    shown = results[:SEARCH_RESULT_LIMIT]
+    st.caption(f"{len(results):,} matching transactions" +
+               (f" (showing the newest {len(shown)})" if len(results) > len(shown) else ""))
+    st.dataframe([
+        {
+            'Date': transaction.date,
+            'Category': category_name(transaction),
+            'Amount': transaction.amount,
+            'Original': f"{dollars(transaction.original_cents):,.2f} {transaction.currency}" if transaction.currency else "",
+            'Type': "Income" if transaction.is_income else "Expense",
+            'Description': transaction.description,
+        }
+        for transaction in shown
+    ], use_container_width=True, hide_index=True)
+
+def transactions_section(display_month, month_expenses, month_name):
+    """List the selected month's transactions with delete buttons for the current month"""
+    is_current_month = display_month == st.session_state.current_month_year
+    
+    with st.expander(f"📋 Transactions - {month_name}", expanded=True), \
+            timed_section("transactions", rows=lambda: len(month_expenses)):
+        st.subheader("Manage Your Transactions")
+        
+        col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 2, 1])
+        with col1:
+            st.write("**Date**")
+        with col2:
+            st.write("**Category**")
+        with col3:
+            st.write("**Amount**")
+        with col4:
+            st.write("**Type**")
+        with col5:
+            st.write("**Description**")
+        with col6:
+            st.write("**Action**")
+        
+        st.write("---")
+        
+        # A split purchase is shown as one row, at its newest allocation
+        splits = {}
+        for expense in month_expenses:
+            if expense.split_id:
+                splits.setdefault(expense.split_id, []).append(expense)
+        
+        # Rows are found by identity: identical transactions compare equal, so
+        # list.index() would give duplicates the same index and widget key
+        expense_indices = {id(expense): index for index, expense in enumerate(st.session_state.expenses)}
+        
+        # Show transactions for selected month
+        for expense in reversed(month_expenses):
+            allocations = splits.get(expense.split_id, [expense]) if expense.split_id else [expense]
+            if allocations[-1] is not expense:
+                continue
+            
+            # Find the actual index in the full expenses list
+            expense_index = expense_indices[id(expense)]
+            amount = dollars(sum(allocation.amount_cents for allocation in allocations))
+            
+            col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 2, 1])
+            
+            with col1:
+                st.write(expense.date)
+            with col2:
+                if len(allocations) > 1:
+                    st.write("Split")
+                    st.caption(" · ".join(f"{category_name(allocation)} ${allocation.amount:,.2f}"
+                                          for allocation in allocations))
+                else:
+                    st.write(category_name(expense))
+            with col3:
+                if expense.is_income:
+                    st.success(f"+${abs(amount):,.2f}")
+                else:
+                    st.write(f"${amount:,.2f}")
+                if expense.currency:
+                    original = dollars(abs(sum(allocation.original_cents for allocation in allocations)))
+                    st.caption(f"{original:,.2f} {expense.currency}")
+            with col4:
+                if expense.is_income:
+                    st.write("Income")
+                else:
+                    st.write("Expense")
+            with col5:
+                st.write(expense.description if expense.description else "-")
+            with col6:
+                # Only allow deletion if it's the current month
+                if is_current_month:
+                    if st.button("🗑️", key=f"delete_{expense_index}", help="Delete this transaction"):
+                        # Every allocation of a split goes, and undo brings them all back
+                        run_command(transactions_command(
+                            f"delete ${abs(amount):,.2f} {expense.description or category_name(expense)}",
+                            deleted=allocations
+                        ), "Transaction deleted and balance updated!")
+                else:
+                    st.write("🔒")  # Locked for past months
+
+ROLLOVER_LABELS = {MONTHS: "month", WEEKS: "week", PAY_PERIODS: "pay period"}
+
+def envelope_caption(cat, display_month):
+    """Carried-in and available amounts of a rollover category in the shown period"""
+    user_data = st.session_state.user_data
+    kind = ROLLOVER_PERIODS[user_data['category_frequencies'][cat]]
+    period = parse_month_label(display_month) if kind == MONTHS else rollover_period(kind, today_ordinal())
+    start = rollover_period(kind, day_ordinal(user_data['category_rollover'][cat]))
+    if period < start:
+        return
+    
+    # None for a category never spent in, which the ledger counts as no spending
+    code = st.session_state.category_dictionary.lookup(cat)
+    budget_cents = user_data['category_budgets'][cat]
+    envelopes = get_envelope_ledger()
+    carried = dollars(envelopes.carried_in(code, budget_cents, start, period))
+    available = dollars(envelopes.available(code, budget_cents, start, period))
+    
+    def signed(amount):
+        return f"${amount:,.2f}" if amount >= 0 else f"-${abs(amount):,.2f}"
+    
+    st.caption(f"🔄 Carried in: {signed(carried)} · Available this {ROLLOVER_LABELS[kind]}: {signed(available)}")
+
+def budget_progress_section(display_month, actual_expenses, month_name, total_monthly_budget, monthly_income):
+    """Spending vs budget per category with trends, followed by the month summary"""
+    user_data = st.session_state.user_data
+    is_current_month = display_month == st.session_state.current_month_year
+    
+    with timed_section("budget_progress", rows=lambda: len(actual_expenses)):
+        # Calculate spending vs budget for selected month
+        # For weekly categories, only count expenses from current week
+        # For monthly categories, count all expenses from the selected month
+        categories = st.session_state.category_dictionary
+        category_cents = categories.by_name(
+            categories.totals((expense.category_code, expense.amount_cents) for expense in actual_expenses)
+        )
+        # Spending in categories removed from the budget counts as unbudgeted too
+        budget_categories = set(user_data['categories'])
+        other_cents = sum(cents for cat, cents in category_cents.items() if cat not in budget_categories)
+        budgeted_cents = sum(cents for cat, cents in category_cents.items() if cat in budget_categories)
+        category_spending = {cat: dollars(cents) for cat, cents in category_cents.items()}
+        other_spending = dollars(other_cents)
+        
+        st.subheader(f"💰 Spending vs Budget - {month_name}")
+        
+        # Show budgeted categories with proper weekly/monthly tracking and trend arrows
+        category_trends = get_category_trends()
+        current_week_spending = categories.by_name(categories.totals(
+            (expense.category_code, expense.amount_cents)
+            for expense in (get_current_week_expenses() if is_current_month else [])
+            if expense.amount_cents > 0
+        ))
+        current_pay_period_spending = {}
+        if is_current_month and PAY_PERIOD in user_data['category_frequencies'].values():
+            current_pay_period_spending = categories.by_name(get_category_spending_current_pay_period())
+            pay_period_label = f"This Pay Period, since {date_from_ordinal(pay_period_first_day(current_pay_period())):%b %d}"
+        
+        for cat in user_data['categories']:
+            spent = category_spending.get(cat, 0)
+            budget = dollars(user_data['category_budgets'][cat])
+            frequency = user_data['category_frequencies'][cat]
+            
+            # Get trend data
+            trend_data = category_trends.get(cat, {'arrow': '➡️', 'status': 'No data', 'percent': 0})
+            
+            # For weekly and pay-period categories, only show spending from the current
+            # week or pay period when viewing current month
+            if frequency != "Monthly" and is_current_month:
+                if frequency == PAY_PERIOD:
+                    week_spent = dollars(current_pay_period_spending.get(cat, 0))
+                    period_label = pay_period_label
+                else:
+                    week_spent = dollars(current_week_spending.get(cat, 0))
+                    period_label = f"{frequency} - This Week"
+                
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.write(f"**{cat}** {trend_data['arrow']}")
+                    st.write(f"({period_label})")
+                    if trend_data['status'] != 'No data':
+                        st.caption(f"Trend: {trend_data['status']}")
+                with col2:
+                    st.write(f"Budget: ${budget:.2f}")
+                with col3:
+                    st.write(f"Spent: ${week_spent:.2f}")
+                with col4:
+                    remaining = budget - week_spent
+                    if remaining >= 0:
+                        st.success(f"Remaining: ${remaining:.2f}")
+                    else:
+                        st.error(f"Over budget: ${abs(remaining):.2f}")
+                
+                # Progress bar
+                if budget > 0:
+                    progress = min(week_spent / budget, 1.0)
+                    st.progress(progress)
+                else:
+                    st.progress(0)
+            
+            else:
+                # Monthly categories or viewing past months
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.write(f"**{cat}** {trend_data['arrow']}")
+                    if frequency != "Monthly" and not is_current_month:
+                        st.write(f"({frequency} - Full Month)")
+                    else:
+                        st.write(f"({frequency})")
+                    if trend_data['status'] != 'No data':
+                        st.caption(f"Trend: {trend_data['status']}")
+                with col2:
+                    if frequency != "Monthly" and not is_current_month:
+                        # Show monthly equivalent for past months
+                        monthly_budget = monthly_budget_equivalent(budget, frequency, user_data['income_frequency'])
+                        st.write(f"Budget: ~${monthly_budget:.2f}")
+                    else:
+                        st.write(f"Budget: ${budget:.2f}")
+                with col3:
+                    st.write(f"Spent: ${spent:.2f}")
+                with col4:
+                    if frequency != "Monthly" and not is_current_month:
+                        monthly_budget = monthly_budget_equivalent(budget, frequency, user_data['income_frequency'])
+                        remaining = monthly_budget - spent
+                    else:
+                        remaining = budget - spent
+                    
+                    if remaining >= 0:
+                        st.success(f"Remaining: ${remaining:.2f}")
+                    else:
+                        st.error(f"Over budget: ${abs(remaining):.2f}")
+                
+                # Progress bar
+                if frequency != "Monthly" and not is_current_month:
+                    monthly_budget = monthly_budget_equivalent(budget, frequency, user_data['income_frequency'])
+                    if monthly_budget > 0:
+                        progress = min(spent / monthly_budget, 1.0)
+                        st.progress(progress)
+                    else:
+                        st.progress(0)
+                else:
+                    if budget > 0:
+                        progress = min(spent / budget, 1.0)
+                        st.progress(progress)
+                    else:
+                        st.progress(0)
+            
+            # Past months are only shown whole, so only monthly envelopes line up with them
+            if cat in user_data.get('category_rollover', {}) and (is_current_month or frequency == "Monthly"):
+                envelope_caption(cat, display_month)
+        
+        if other_spending > 0:
+            st.write("---")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.write("**Other (No Budget)**")
+                st.write("(Unbudgeted)")
+            with col2:
+                st.write("Budget: Not applicable")
+            with col3:
+                st.write(f"Spent: ${other_spending:.2f}")
+            with col4:
+                st.info("No budget limit")
+    
+    total_spent = dollars(budgeted_cents + other_cents)
+    st.subheader(f"📊 Monthly Summary - {month_name}")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Spent", f"${total_spent:,.2f}")
+    with col2:
+        budget_remaining = total_monthly_budget - dollars(budgeted_cents)
+        st.metric("Budget Remaining", f"${budget_remaining:,.2f}")
+        if other_spending > 0:
+            st.caption(f"(+${other_spending:.2f} unbudgeted)")
+    with col3:
+        if is_current_month:
+            st.metric("Current Balance", f"${dollars(current_balance()):,.2f}")
+        else:
+            st.metric("Month Status", "Archived")
+    with col4:
+        if is_current_month:
+            money_saved = monthly_income - total_spent
+            delta_color = "normal" if money_saved >= 0 else "inverse"
+            st.metric("Money Saved This Month", f"${money_saved:,.2f}", 
+                     delta=f"${money_saved:,.2f}" if money_saved >= 0 else f"-${abs(money_saved):,.2f}",
+                     delta_color=delta_color)
+        else:
+            # For past months, show if they were over/under budget
+            money_saved = monthly_income - total_spent
+            if money_saved >= 0:
+                st.metric("Month Result", f"+${money_saved:,.2f}", "Saved money")
+            else:
+                st.metric("Month Result", f"-${abs(money_saved):,.2f}", "Over budget")
+
+def savings_progress_section():
+    """Progress of the first few savings goals"""
+    st.subheader("🎯 Savings Goals Progress")
+    
+    cols = st.columns(min(len(st.session_state.savings_goals), 3))
+    for i, goal in enumerate(islice(st.session_state.savings_goals, 3)):
+        with cols[i % 3]:
+            progress = goal.progress
+            st.metric(
+                goal.name,
+                f"${goal.current_amount:,.0f}",
+                f"{progress*100:.1f}% of ${goal.target_amount:,.0f}"
+            )
+            st.progress(progress)
+    
+    if len(st.session_state.savings_goals) > 3:
+        st.caption(f"...and {len(st.session_state.savings_goals) - 3} more goals")
+
 def main_dashboard():
     """Main dashboard for existing users"""
     user_data = st.session_state.user_data
     
+    ensure_budget_periods()
+    ensure_balance_ledger()
     check_and_add_income()
     
     st.title("💰 Personal Budget Tracker")
     
-    with st.sidebar:
+    balance_check = st.session_state.pop('balance_check', None)
+    if balance_check:
+        st.warning(f"⚠️ The imported balance (${dollars(balance_check['stored']):,.2f}) didn't match the one "
+                   f"derived from your transactions (${dollars(balance_check['derived']):,.2f}). "
+                   "The derived balance is used.")
+    
+    change_message = st.session_state.pop('change_message', None)
+    if change_message:
+        st.success(change_message)
+    
+    with st.sidebar, timed_section("sidebar"):
         st.header("⚙️ Manage Budget")
         
         if st.button("💰 Update Income"):
@@ -1038,6 +2347,20 @@ def main_dashboard():
         if st.button("📊 View Analytics"):
             st.session_state.show_analytics = True
         
+        history = st.session_state.command_log
+        undo_label, redo_label = history.next_undo(), history.next_redo()
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("↩️ Undo", disabled=undo_label is None, help=f"Undo {undo_label}" if undo_label else None):
+                history.undo()
+                st.rerun()
+        with col2:
+            if st.button("↪️ Redo", disabled=redo_label is None, help=f"Redo {redo_label}" if redo_label else None):
+                history.redo()
+                st.rerun()
+        if undo_label:
+            st.caption(f"Last change: {undo_label}")
+        
         st.write("---")
         
         # Monthly reset settings
@@ -1055,11 +2378,12 @@ def main_dashboard():
         
         if new_reset_day != user_data.get('monthly_reset_day', 1):
             st.session_state.user_data['monthly_reset_day'] = new_reset_day
+            recompute_budget_periods()
             st.success(f"Budget will reset on the {new_reset_day}th of each month")
         
         # Show current budget month
-        current_month_date = datetime.strptime(st.session_state.current_month_year, "%Y-%m")
-        st.write(f"**Current budget month:** {current_month_date.strftime('%B %Y')}")
+        current_month_name = month_display_name(parse_month_label(st.session_state.current_month_year))
+        st.write(f"**Current budget month:** {current_month_name}")
         
         # Month selector for viewing different months
         available_months = get_available_months()
@@ -1067,23 +2391,16 @@ def main_dashboard():
             st.subheader("📊 View Month")
             month_options = []
             for month in available_months:
-                month_date = datetime.strptime(month, "%Y-%m")
+                month_name = month_display_name(parse_month_label(month))
                 if month == st.session_state.current_month_year:
-                    month_options.append(f"{month_date.strftime('%B %Y')} (Current)")
+                    month_options.append(f"{month_name} (Current)")
                 else:
-                    month_options.append(month_date.strftime('%B %Y'))
+                    month_options.append(month_name)
             
             selected_display = st.selectbox("Select month to view:", month_options)
             
             # Convert back to month_year format
-            if "(Current)" in selected_display:
-                selected_month = st.session_state.current_month_year
-            else:
-                for month in available_months:
-                    month_date = datetime.strptime(month, "%Y-%m")
-                    if month_date.strftime('%B %Y') == selected_display:
-                        selected_month = month
-                        break
+            selected_month = available_months[month_options.index(selected_display)]
             
             if 'selected_month' not in st.session_state:
                 st.session_state.selected_month = st.session_state.current_month_year
@@ -1099,35 +2416,7 @@ def main_dashboard():
         st.subheader("📁 Data Management")
         
         if st.button("📤 Export Data to CSV"):
-            user_data_df = pd.DataFrame([{
-                'data_type': 'user_settings',
-                'current_balance': user_data['current_balance'],
-                'income_amount': user_data['income_amount'],
-                'income_frequency': user_data['income_frequency'],
-                'payment_day': str(user_data['payment_day']),
-                'setup_date': user_data['setup_date'],
-                'monthly_reset_day': user_data.get('monthly_reset_day', 1),
-                'current_month_year': st.session_state.current_month_year,
-                'categories': '|'.join(user_data['categories']),
-                'category_budgets': '|'.join([f"{k}:{v}" for k, v in user_data['category_budgets'].items()]),
-                'category_frequencies': '|'.join([f"{k}:{v}" for k, v in user_data['category_frequencies'].items()])
-            }])
-            
-            expenses_df = pd.DataFrame(st.session_state.expenses)
-            if not expenses_df.empty:
-                expenses_df['data_type'] = 'expense'
-            else:
-                expenses_df = pd.DataFrame(columns=['data_type', 'date', 'category', 'amount', 'description', 'frequency'])
-            
-            if st.session_state.savings_goals:
-                savings_df = pd.DataFrame(st.session_state.savings_goals)
-                savings_df['data_type'] = 'savings_goal'
-            else:
-                savings_df = pd.DataFrame(columns=['data_type', 'id', 'name', 'target_amount', 'current_amount', 'description', 'created_date', 'completed'])
-            
-            combined_df = pd.concat([user_data_df, expenses_df, savings_df], ignore_index=True, sort=False)
-            
-            csv_data = combined_df.to_csv(index=False)
+            csv_data = export_budget_data()
             st.download_button(
                 label="💾 Download CSV",
                 data=csv_data,
@@ -1139,82 +2428,7 @@ def main_dashboard():
         if uploaded_file is not None:
             if st.button("🔄 Load Data", type="primary"):
                 try:
-                    df = pd.read_csv(uploaded_file)
-                    
-                    user_settings = df[df['data_type'] == 'user_settings'].iloc[0]
-                    
-                    categories = user_settings['categories'].split('|') if pd.notna(user_settings['categories']) else []
-                    category_budgets = {}
-                    category_frequencies = {}
-                    
-                    if pd.notna(user_settings['category_budgets']):
-                        for item in user_settings['category_budgets'].split('|'):
-                            if ':' in item:
-                                k, v = item.split(':', 1)
-                                category_budgets[k] = float(v)
-                    
-                    if pd.notna(user_settings['category_frequencies']):
-                        for item in user_settings['category_frequencies'].split('|'):
-                            if ':' in item:
-                                k, v = item.split(':', 1)
-                                category_frequencies[k] = v
-                    
-                    payment_day_value = user_settings['payment_day']
-                    if isinstance(payment_day_value, (int, float)) or (isinstance(payment_day_value, str) and payment_day_value.replace('.', '').isdigit()):
-                        payment_day = int(float(payment_day_value))
-                    else:
-                        payment_day = str(payment_day_value)
-                    
-                    st.session_state.user_data = {
-                        'current_balance': float(user_settings['current_balance']),
-                        'income_amount': float(user_settings['income_amount']),
-                        'income_frequency': user_settings['income_frequency'],
-                        'payment_day': payment_day,
-                        'setup_date': user_settings['setup_date'],
-                        'monthly_reset_day': int(user_settings.get('monthly_reset_day', 1)),
-                        'categories': categories,
-                        'category_budgets': category_budgets,
-                        'category_frequencies': category_frequencies
-                    }
-                    
-                    # Restore current month year if available
-                    if 'current_month_year' in user_settings and pd.notna(user_settings['current_month_year']):
-                        st.session_state.current_month_year = user_settings['current_month_year']
-                    else:
-                        # Default to current month if not in saved data
-                        today = datetime.now()
-                        st.session_state.current_month_year = f"{today.year}-{today.month:02d}"
-                    
-                    expenses_data = df[df['data_type'] == 'expense']
-                    st.session_state.expenses = []
-                    
-                    for _, expense in expenses_data.iterrows():
-                        if pd.notna(expense['date']) and pd.notna(expense['category']):
-                            st.session_state.expenses.append({
-                                'date': expense['date'],
-                                'category': expense['category'],
-                                'amount': float(expense['amount']) if pd.notna(expense['amount']) else 0.0,
-                                'description': expense['description'] if pd.notna(expense['description']) else '',
-                                'frequency': expense['frequency'] if pd.notna(expense['frequency']) else 'Monthly'
-                            })
-                    
-                    savings_data = df[df['data_type'] == 'savings_goal']
-                    st.session_state.savings_goals = []
-                    
-                    for _, goal in savings_data.iterrows():
-                        if pd.notna(goal.get('name')):
-                            st.session_state.savings_goals.append({
-                                'id': int(goal.get('id', 0)),
-                                'name': goal['name'],
-                                'target_amount': float(goal.get('target_amount', 0)),
-                                'current_amount': float(goal.get('current_amount', 0)),
-                                'description': goal.get('description', ''),
-                                'created_date': goal.get('created_date', datetime.now().isoformat()),
-                                'completed': bool(goal.get('completed', False))
-                            })
-                    
-                    st.session_state.user_setup_complete = True
-                    st.session_state.last_updated = datetime.now().date()
+                    import_budget_data(uploaded_file)
                     
                     st.success("✅ Data loaded successfully!")
                     st.rerun()
@@ -1223,6 +2437,21 @@ def main_dashboard():
                     st.error(f"❌ Error loading data: {str(e)}")
                     st.error("Please make sure you're uploading a valid budget tracker CSV file.")
         
+        rates_file = st.file_uploader("💱 Exchange Rates (CSV: date, currency, rate)", type=['csv'],
+                                      help=f"Value of one unit of each currency in {base_currency()}, from each date on")
+        if rates_file is not None:
+            if st.button("💱 Load Rates"):
+                try:
+                    changed = load_exchange_rates(rates_file)
+                    st.success(f"✅ Loaded rates; {changed} foreign transactions re-valued.")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error loading exchange rates: {str(e)}")
+        rate_table = st.session_state.get('rate_table')
+        if rate_table is not None:
+            st.caption(f"Rates for {', '.join(rate_table.currencies()) or 'no other currencies'} "
+                       f"in {rate_table.base}")
+        
         st.write("---")
         st.write("**Setup Date:**")
         setup_date = datetime.fromisoformat(user_data['setup_date']).strftime("%B %d, %Y")
@@ -1232,6 +2461,13 @@ def main_dashboard():
         st.write("⚠️ **Data Storage Note:**")
         st.write("Data only persists during this browser session. For permanent storage, export your data regularly.")
         
+        st.checkbox("🐞 Show rerun timings", value=enabled_by_default(), key="instrumentation_enabled",
+                    help="Record how long each dashboard section takes and log it for offline analysis")
+        
+        if st.button("🔬 Profile Next Rerun", help="Capture a full cProfile trace of exactly one dashboard rerun"):
+            st.session_state.profile_next_rerun = True
+            st.rerun()
+        
         if st.button("🔄 Reset All Data", type="secondary"):
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
@@ -1268,24 +2504,31 @@ def main_dashboard():
         next_payment_date = calculate_next_payment_date(user_data['income_frequency'], user_data['payment_day'])
         days_until_payment = (next_payment_date - date.today()).days
         
+        income_amount = dollars(user_data['income_amount'])
         if user_data['income_frequency'] == "Weekly":
-            monthly_income = user_data['income_amount'] * 4.33
+            monthly_income = income_amount * 4.33
         elif user_data['income_frequency'] == "Fortnightly":
-            monthly_income = user_data['income_amount'] * 2.167
+            monthly_income = income_amount * 2.167
         else:
-            monthly_income = user_data['income_amount']
+            monthly_income = income_amount
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Current Balance", f"${user_data['current_balance']:,.2f}")
+            st.metric("Current Balance", f"${dollars(current_balance()):,.2f}")
+            if display_month != st.session_state.current_month_year:
+                # Budget months are contiguous in the ledger, so the month ends at its last transaction
+                past_month = get_expenses_by_month(display_month)
+                if past_month:
+                    month_end_balance = st.session_state.balance_ledger.balance_at(past_month[-1].timestamp)
+                    st.caption(f"At the end of {month_date:%B %Y}: ${dollars(month_end_balance):,.2f}")
         with col2:
             if user_data['income_frequency'] == "Monthly":
-                st.metric("Monthly Income", f"${user_data['income_amount']:,.2f}")
+                st.metric("Monthly Income", f"${income_amount:,.2f}")
             else:
-                st.metric(f"{user_data['income_frequency']} Income", f"${user_data['income_amount']:,.2f}")
+                st.metric(f"{user_data['income_frequency']} Income", f"${income_amount:,.2f}")
         with col3:
-            projected_balance = user_data['current_balance'] + user_data['income_amount']
+            projected_balance = dollars(current_balance() + user_data['income_amount'])
             st.metric("Balance + Next Pay", f"${projected_balance:,.2f}")
         with col4:
             if days_until_payment == 0:
@@ -1297,17 +2540,11 @@ def main_dashboard():
         
         st.header("📋 Budget Overview")
         
-        # Add spending velocity tracker
-        display_spending_velocity()
-        
         total_monthly_budget = 0
         for cat in user_data['categories']:
-            amount = user_data['category_budgets'][cat]
+            amount = dollars(user_data['category_budgets'][cat])
             frequency = user_data['category_frequencies'][cat]
-            if frequency == "Weekly":
-                total_monthly_budget += amount * 4.33
-            else:
-                total_monthly_budget += amount
+            total_monthly_budget += monthly_budget_equivalent(amount, frequency, user_data['income_frequency'])
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -1322,296 +2559,56 @@ def main_dashboard():
                 budget_percentage = (total_monthly_budget / monthly_income) * 100
                 st.metric("Budget % of Income", f"{budget_percentage:.1f}%")
         
-        st.header("💳 Add New Expense")
+        section = st.radio("Dashboard section:", DASHBOARD_SECTIONS, horizontal=True,
+                           key="dashboard_section", label_visibility="collapsed")
         
-        col1, col2, col3 = st.columns(3)
+        # Only the visible section computes anything
+        if section == "💳 Add Expense":
+            add_expense_section()
         
-        with col1:
-            expense_categories = user_data['categories'] + ["Other (No Budget)"]
-            expense_category = st.selectbox("Category:", expense_categories)
-        with col2:
-            expense_amount = st.number_input("Amount ($):", min_value=0.0, step=0.01, key="expense_amount")
-        with col3:
-            expense_description = st.text_input("Description (optional):", key="expense_desc")
+        elif section == "⚡ Spending Velocity":
+            display_spending_velocity()
         
-        if st.button("Add Expense", type="primary"):
-            if expense_amount > 0:
-                if expense_category == "Other (No Budget)":
-                    expense_frequency = "Monthly"
-                else:
-                    expense_frequency = user_data['category_frequencies'][expense_category]
-                
-                expense = {
-                    'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    'category': expense_category,
-                    'amount': expense_amount,
-                    'description': expense_description,
-                    'frequency': expense_frequency
-                }
-                st.session_state.expenses.append(expense)
-                
-                st.session_state.user_data['current_balance'] -= expense_amount
-                
-                if expense_category == "Other (No Budget)":
-                    st.success(f"Added ${expense_amount:.2f} expense to {expense_category}")
-                    st.info("💡 This expense won't count against any budget category.")
-                else:
-                    st.success(f"Added ${expense_amount:.2f} expense to {expense_category}")
-                
-                st.info(f"Updated balance: ${st.session_state.user_data['current_balance']:,.2f}")
-                st.rerun()
+        elif section == "🔍 Search":
+            search_section()
+        
+        elif section == "🚨 Unusual Spending":
+            anomalies_section()
+        
+        elif section == "🎯 Savings Progress":
+            if st.session_state.savings_goals:
+                savings_progress_section()
             else:
-                st.error("Please enter a valid amount")
+                st.info("Add a savings goal from the sidebar to track its progress here.")
         
-        if st.session_state.expenses:
+        elif not st.session_state.expenses:
+            st.info("Add some expenses to start tracking your spending!")
+        
+        else:
             # Get expenses for the selected month
             month_expenses = get_expenses_by_month(display_month)
+            month_name = month_date.strftime('%B %Y')
             
             if display_month == st.session_state.current_month_year:
                 st.header("📈 Spending Analysis - Current Month")
             else:
-                st.header(f"📈 Spending Analysis - {month_date.strftime('%B %Y')}")
+                st.header(f"📈 Spending Analysis - {month_name}")
             
             # Filter expenses for analysis (exclude income)
-            actual_expenses = [e for e in month_expenses if e['amount'] > 0]
+            actual_expenses = [e for e in month_expenses if e.amount_cents > 0]
             
-            if actual_expenses:
-                with st.expander(f"📋 Transactions - {month_date.strftime('%B %Y')}", expanded=True):
-                    st.subheader("Manage Your Transactions")
-                    
-                    col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 2, 1])
-                    with col1:
-                        st.write("**Date**")
-                    with col2:
-                        st.write("**Category**")
-                    with col3:
-                        st.write("**Amount**")
-                    with col4:
-                        st.write("**Type**")
-                    with col5:
-                        st.write("**Description**")
-                    with col6:
-                        st.write("**Action**")
-                    
-                    st.write("---")
-                    
-                    # Show transactions for selected month
-                    for expense in reversed(month_expenses):
-                        # Find the actual index in the full expenses list
-                        expense_index = st.session_state.expenses.index(expense)
-                        
-                        col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 1, 1, 2, 1])
-                        
-                        with col1:
-                            st.write(expense['date'])
-                        with col2:
-                            st.write(expense['category'])
-                        with col3:
-                            if expense['amount'] < 0:
-                                st.success(f"+${abs(expense['amount']):,.2f}")
-                            else:
-                                st.write(f"${expense['amount']:,.2f}")
-                        with col4:
-                            if expense['amount'] < 0:
-                                st.write("Income")
-                            else:
-                                st.write("Expense")
-                        with col5:
-                            st.write(expense['description'] if expense['description'] else "-")
-                        with col6:
-                            # Only allow deletion if it's the current month
-                            if display_month == st.session_state.current_month_year:
-                                if st.button("🗑️", key=f"delete_{expense_index}", help="Delete this transaction"):
-                                    if expense['amount'] > 0:
-                                        st.session_state.user_data['current_balance'] += expense['amount']
-                                    elif expense['amount'] < 0:
-                                        st.session_state.user_data['current_balance'] -= abs(expense['amount'])
-                                    
-                                    st.session_state.expenses.pop(expense_index)
-                                    st.success("Transaction deleted and balance updated!")
-                                    st.rerun()
-                            else:
-                                st.write("🔒")  # Locked for past months
-                
-                # Calculate spending vs budget for selected month
-                category_spending = {}
-                other_spending = 0
-                
-                # For weekly categories, only count expenses from current week
-                # For monthly categories, count all expenses from the selected month
-                for expense in actual_expenses:
-                    cat = expense['category']
-                    if cat == "Other (No Budget)":
-                        other_spending += expense['amount']
-                    else:
-                        category_spending[cat] = category_spending.get(cat, 0) + expense['amount']
-                
-                st.subheader(f"💰 Spending vs Budget - {month_date.strftime('%B %Y')}")
-                
-                # Show budgeted categories with proper weekly/monthly tracking and trend arrows
-                category_trends = get_category_trends()
-                
-                for cat in user_data['categories']:
-                    spent = category_spending.get(cat, 0)
-                    budget = user_data['category_budgets'][cat]
-                    frequency = user_data['category_frequencies'][cat]
-                    
-                    # Get trend data
-                    trend_data = category_trends.get(cat, {'arrow': '➡️', 'status': 'No data', 'percent': 0})
-                    
-                    # For weekly categories, only show spending from current week when viewing current month
-                    if frequency == "Weekly" and display_month == st.session_state.current_month_year:
-                        # Get current week expenses for this category
-                        current_week_expenses = get_current_week_expenses()
-                        week_spent = 0
-                        for expense in current_week_expenses:
-                            if expense['amount'] > 0 and expense['category'] == cat:
-                                week_spent += expense['amount']
-                        
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            st.write(f"**{cat}** {trend_data['arrow']}")
-                            st.write(f"({frequency} - This Week)")
-                            if trend_data['status'] != 'No data':
-                                st.caption(f"Trend: {trend_data['status']}")
-                        with col2:
-                            st.write(f"Budget: ${budget:.2f}")
-                        with col3:
-                            st.write(f"Spent: ${week_spent:.2f}")
-                        with col4:
-                            remaining = budget - week_spent
-                            if remaining >= 0:
-                                st.success(f"Remaining: ${remaining:.2f}")
-                            else:
-                                st.error(f"Over budget: ${abs(remaining):.2f}")
-                        
-                        # Progress bar
-                        if budget > 0:
-                            progress = min(week_spent / budget, 1.0)
-                            st.progress(progress)
-                        else:
-                            st.progress(0)
-                    
-                    else:
-                        # Monthly categories or viewing past months
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        with col1:
-                            st.write(f"**{cat}** {trend_data['arrow']}")
-                            if frequency == "Weekly" and display_month != st.session_state.current_month_year:
-                                st.write(f"({frequency} - Full Month)")
-                            else:
-                                st.write(f"({frequency})")
-                            if trend_data['status'] != 'No data':
-                                st.caption(f"Trend: {trend_data['status']}")
-                        with col2:
-                            if frequency == "Weekly" and display_month != st.session_state.current_month_year:
-                                # Show monthly equivalent for past months
-                                monthly_budget = budget * 4.33
-                                st.write(f"Budget: ~${monthly_budget:.2f}")
-                            else:
-                                st.write(f"Budget: ${budget:.2f}")
-                        with col3:
-                            st.write(f"Spent: ${spent:.2f}")
-                        with col4:
-                            if frequency == "Weekly" and display_month != st.session_state.current_month_year:
-                                monthly_budget = budget * 4.33
-                                remaining = monthly_budget - spent
-                            else:
-                                remaining = budget - spent
-                            
-                            if remaining >= 0:
-                                st.success(f"Remaining: ${remaining:.2f}")
-                            else:
-                                st.error(f"Over budget: ${abs(remaining):.2f}")
-                        
-                        # Progress bar
-                        if frequency == "Weekly" and display_month != st.session_state.current_month_year:
-                            monthly_budget = budget * 4.33
-                            if monthly_budget > 0:
-                                progress = min(spent / monthly_budget, 1.0)
-                                st.progress(progress)
-                            else:
-                                st.progress(0)
-                        else:
-                            if budget > 0:
-                                progress = min(spent / budget, 1.0)
-                                st.progress(progress)
-                            else:
-                                st.progress(0)
-                
-                if other_spending > 0:
-                    st.write("---")
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.write("**Other (No Budget)**")
-                        st.write("(Unbudgeted)")
-                    with col2:
-                        st.write("Budget: Not applicable")
-                    with col3:
-                        st.write(f"Spent: ${other_spending:.2f}")
-                    with col4:
-                        st.info("No budget limit")
-                
-                total_spent = sum(category_spending.values()) + other_spending
-                st.subheader(f"📊 Monthly Summary - {month_date.strftime('%B %Y')}")
-                
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total Spent", f"${total_spent:,.2f}")
-                with col2:
-                    budget_remaining = total_monthly_budget - sum(category_spending.values())
-                    st.metric("Budget Remaining", f"${budget_remaining:,.2f}")
-                    if other_spending > 0:
-                        st.caption(f"(+${other_spending:.2f} unbudgeted)")
-                with col3:
-                    if display_month == st.session_state.current_month_year:
-                        st.metric("Current Balance", f"${st.session_state.user_data['current_balance']:,.2f}")
-                    else:
-                        st.metric("Month Status", "Archived")
-                with col4:
-                    if display_month == st.session_state.current_month_year:
-                        money_saved = monthly_income - total_spent
-                        delta_color = "normal" if money_saved >= 0 else "inverse"
-                        st.metric("Money Saved This Month", f"${money_saved:,.2f}", 
-                                 delta=f"${money_saved:,.2f}" if money_saved >= 0 else f"-${abs(money_saved):,.2f}",
-                                 delta_color=delta_color)
-                    else:
-                        # For past months, show if they were over/under budget
-                        money_saved = monthly_income - total_spent
-                        if money_saved >= 0:
-                            st.metric("Month Result", f"+${money_saved:,.2f}", "Saved money")
-                        else:
-                            st.metric("Month Result", f"-${abs(money_saved):,.2f}", "Over budget")
-                
-                # Only show savings goals for current month
-                if display_month == st.session_state.current_month_year and st.session_state.savings_goals:
-                    st.subheader("🎯 Savings Goals Progress")
-                    
-                    cols = st.columns(min(len(st.session_state.savings_goals), 3))
-                    for i, goal in enumerate(st.session_state.savings_goals[:3]):
-                        with cols[i % 3]:
-                            progress = min(goal['current_amount'] / goal['target_amount'], 1.0)
-                            st.metric(
-                                goal['name'],
-                                f"${goal['current_amount']:,.0f}",
-                                f"{progress*100:.1f}% of ${goal['target_amount']:,.0f}"
-                            )
-                            st.progress(progress)
-                    
-                    if len(st.session_state.savings_goals) > 3:
-                        st.caption(f"...and {len(st.session_state.savings_goals) - 3} more goals")
-            
-            else:
+            if not actual_expenses:
                 if display_month == st.session_state.current_month_year:
                     st.info("Add some expenses to see your spending analysis!")
                 else:
-                    st.info(f"No expenses recorded for {month_date.strftime('%B %Y')}")
-        else:
-            st.info("Add some expenses to start tracking your spending!")
+                    st.info(f"No expenses recorded for {month_name}")
+            elif section == "📋 Transactions":
+                transactions_section(display_month, month_expenses, month_name)
+            else:
+                budget_progress_section(display_month, actual_expenses, month_name, total_monthly_budget, monthly_income)
 
 def main():
+    begin_rerun()
     initialize_session_state()
     load_user_data()
     
@@ -1632,82 +2629,7 @@ def main():
             if uploaded_file is not None:
                 if st.button("🔄 Load My Data", type="primary"):
                     try:
-                        df = pd.read_csv(uploaded_file)
-                        
-                        user_settings = df[df['data_type'] == 'user_settings'].iloc[0]
-                        
-                        categories = user_settings['categories'].split('|') if pd.notna(user_settings['categories']) else []
-                        category_budgets = {}
-                        category_frequencies = {}
-                        
-                        if pd.notna(user_settings['category_budgets']):
-                            for item in user_settings['category_budgets'].split('|'):
-                                if ':' in item:
-                                    k, v = item.split(':', 1)
-                                    category_budgets[k] = float(v)
-                        
-                        if pd.notna(user_settings['category_frequencies']):
-                            for item in user_settings['category_frequencies'].split('|'):
-                                if ':' in item:
-                                    k, v = item.split(':', 1)
-                                    category_frequencies[k] = v
-                        
-                        payment_day_value = user_settings['payment_day']
-                        if isinstance(payment_day_value, (int, float)) or (isinstance(payment_day_value, str) and payment_day_value.replace('.', '').isdigit()):
-                            payment_day = int(float(payment_day_value))
-                        else:
-                            payment_day = str(payment_day_value)
-                        
-                        st.session_state.user_data = {
-                            'current_balance': float(user_settings['current_balance']),
-                            'income_amount': float(user_settings['income_amount']),
-                            'income_frequency': user_settings['income_frequency'],
-                            'payment_day': payment_day,
-                            'setup_date': user_settings['setup_date'],
-                            'monthly_reset_day': int(user_settings.get('monthly_reset_day', 1)),
-                            'categories': categories,
-                            'category_budgets': category_budgets,
-                            'category_frequencies': category_frequencies
-                        }
-                        
-                        # Restore current month year if available
-                        if 'current_month_year' in user_settings and pd.notna(user_settings['current_month_year']):
-                            st.session_state.current_month_year = user_settings['current_month_year']
-                        else:
-                            # Default to current month if not in saved data
-                            today = datetime.now()
-                            st.session_state.current_month_year = f"{today.year}-{today.month:02d}"
-                        
-                        expenses_data = df[df['data_type'] == 'expense']
-                        st.session_state.expenses = []
-                        
-                        for _, expense in expenses_data.iterrows():
-                            if pd.notna(expense['date']) and pd.notna(expense['category']):
-                                st.session_state.expenses.append({
-                                    'date': expense['date'],
-                                    'category': expense['category'],
-                                    'amount': float(expense['amount']) if pd.notna(expense['amount']) else 0.0,
-                                    'description': expense['description'] if pd.notna(expense['description']) else '',
-                                    'frequency': expense['frequency'] if pd.notna(expense['frequency']) else 'Monthly'
-                                })
-                        
-                        savings_data = df[df['data_type'] == 'savings_goal']
-                        st.session_state.savings_goals = []
-                        
-                        for _, goal in savings_data.iterrows():
-                            if pd.notna(goal.get('name')):
-                                st.session_state.savings_goals.append({
-                                    'id': int(goal.get('id', 0)),
-                                    'name': goal['name'],
-                                    'target_amount': float(goal.get('target_amount', 0)),
-                                    'current_amount': float(goal.get('current_amount', 0)),
-                                    'description': goal.get('description', ''),
-                                    'created_date': goal.get('created_date', datetime.now().isoformat()),
-                                    'completed': bool(goal.get('completed', False))
-                                })
-                        
-                        st.session_state.user_setup_complete = True
-                        st.session_state.last_updated = datetime.now().date()
+                        import_budget_data(uploaded_file)
                         
                         st.success("✅ Welcome back! Your data has been loaded successfully!")
                         st.rerun()
@@ -1719,7 +2641,13 @@ def main():
         if st.session_state.get('start_fresh', False):
             user_setup_wizard()
     else:
-        main_dashboard()
+        if st.session_state.pop('profile_next_rerun', False):
+            capture_profile(main_dashboard)
+        else:
+            main_dashboard()
+        display_profile_panel()
+    
+    end_rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Category dictionary: interned category names with stable integer codes.
+
+Transactions store a category code rather than the name, so renaming a
+category is a single dictionary update and every historical row follows it.
+Codes are dense (0..len-1), which lets per-category totals be accumulated
+into a flat list indexed by code instead of a dict keyed by name.
+"""
+import sys
+
+
+class CategoryDictionary:
+    """Two-way mapping between category names and integer codes"""
+    __slots__ = ('_names', '_codes', 'version')
+
+    def __init__(self, names=()):
+        self._names = []
+        self._codes = {}
+        # Bumped whenever a name is added or renamed, for caches keyed on it
+        self.version = 0
+        for name in names:
+            self.code(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._codes
+
+    def code(self, name):
+        """Code for a category name, assigning the next free one if it's new"""
+        code = self._codes.get(name)
+        if code is None:
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError(f"Invalid category name {name!r}")
+            code = len(self._names)
+            name = sys.intern(name)
+            self._names.append(name)
+            self._codes[name] = code
+            self.version += 1
+        return code
+
+    def lookup(self, name):
+        """Code for a category name, or None if it has never been used"""
+        return self._codes.get(name)
+
+    def name(self, code):
+        """Category name for a code"""
+        return self._names[code]
+
+    def names(self):
+        """All names, indexed by code"""
+        return list(self._names)
+
+    def rename(self, old_name, new_name):
+        """Rename a category in place; rows keep their code, so they follow the rename"""
+        if new_name in self._codes:
+            raise ValueError(f"Category {new_name!r} already exists")
+        if not new_name.strip():
+            raise ValueError("Category name is required")
+        code = self._codes.pop(old_name)
+        new_name = sys.intern(new_name)
+        self._names[code] = new_name
+        self._codes[new_name] = code
+        self.version += 1
+        return code
+
+    def totals(self, codes_and_amounts):
+        """Sum amounts per code (a bincount) into a list indexed by code"""
+        totals = [0] * len(self._names)
+        for code, amount in codes_and_amounts:
+            totals[code] += amount
+        return totals
+
+    def by_name(self, totals, skip_zero=True):
+        """Turn a list indexed by code back into a {name: total} dict"""
+        return {
+            self._names[code]: total
+            for code, total in enumerate(totals)
+            if total or not skip_zero
+        }
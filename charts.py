@@ -0,0 +1,80 @@
+"""Chart data reduction and caching before it is sent to the browser.
+
+Streamlit serializes every point of a chart's DataFrame to the frontend, so
+render_line_chart and render_bar_chart reduce their data server-side to at most
+CHART_MAX_POINTS rows first: line charts keep each bucket's extremes
+(minmax), so peaks and troughs survive, and bar charts keep the largest bars
+and fold the rest into "Other".
+
+The reduced frame is cached in session state per chart name and data
+version, so reruns that don't change the data skip building and reducing it.
+"""
+import streamlit as st
+
+CHART_MAX_POINTS = 500
+
+
+def minmax_indices(values, max_points=CHART_MAX_POINTS):
+    """Indices of each bucket's lowest and highest value, in order"""
+    import numpy as np
+
+    count = len(values)
+    if count <= max_points:
+        return np.arange(count)
+
+    edges = np.linspace(0, count, max(max_points // 2, 1) + 1).astype(np.int64)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            bucket = values[start:end]
+            keep.append(start + int(np.argmin(bucket)))
+            keep.append(start + int(np.argmax(bucket)))
+    return np.unique(np.asarray(keep, dtype=np.int64))
+
+
+def downsample_frame(frame, max_points=CHART_MAX_POINTS):
+    """Reduce a line chart's rows; every column keeps its own extremes"""
+    import numpy as np
+
+    if len(frame) <= max_points:
+        return frame
+
+    values = frame.to_numpy(dtype=float)
+    per_column = max(max_points // values.shape[1], 2)
+    keep = np.unique(np.concatenate([minmax_indices(values[:, column], per_column)
+                                     for column in range(values.shape[1])]))
+    return frame.iloc[keep]
+
+
+def top_bars(frame, max_points=CHART_MAX_POINTS):
+    """Keep the largest bars (by the first column) and sum the rest into an 'Other' bar"""
+    import pandas as pd
+
+    if len(frame) <= max_points:
+        return frame
+
+    ordered = frame.sort_values(frame.columns[0], ascending=False)
+    kept, rest = ordered.iloc[:max_points - 1], ordered.iloc[max_points - 1:]
+    return pd.concat([kept, rest.sum().to_frame(name="Other").T])
+
+
+def cached_chart_data(name, version, build, reduce):
+    """The reduced frame for a chart, rebuilt only when its data version changes"""
+    cache = st.session_state.setdefault('_chart_cache', {})
+    entry = cache.get(name)
+    if entry is None or entry[0] != version:
+        entry = (version, reduce(build()))
+        cache[name] = entry
+    return entry[1]
+
+
+def render_line_chart(name, version, build, max_points=CHART_MAX_POINTS, **kwargs):
+    """st.line_chart of build()'s indexed frame, downsampled and cached per version"""
+    data = cached_chart_data(name, version, build, lambda frame: downsample_frame(frame, max_points))
+    st.line_chart(data, **kwargs)
+
+
+def render_bar_chart(name, version, build, max_points=CHART_MAX_POINTS, **kwargs):
+    """st.bar_chart of build()'s indexed frame, limited to max_points bars and cached per version"""
+    data = cached_chart_data(name, version, build, lambda frame: top_bars(frame, max_points))
+    st.bar_chart(data, **kwargs)
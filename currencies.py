@@ -0,0 +1,92 @@
+"""Exchange rates for transactions made in other currencies.
+
+A RateTable holds, per currency, dated rates: the base-currency value of one
+unit of that currency, in force from its date until the next rate. It is
+loaded from a local CSV file (date, currency, rate) rather than fetched.
+
+Foreign transactions keep the amount they were made in (original_cents and
+currency) and store amount_cents in the base currency, so balances, budgets
+and charts keep summing a single integer column. Conversion is an as-of
+join: per currency, one searchsorted of the rows' days into the rate dates,
+done for every row at once when rates are loaded.
+"""
+DEFAULT_BASE_CURRENCY = "USD"
+RATE_COLUMNS = ['date', 'currency', 'rate']
+
+
+def normalize_currency(code):
+    """Upper-case ISO-style currency code, e.g. ' eur' -> 'EUR'"""
+    if not isinstance(code, str) or not code.strip().isalpha():
+        raise ValueError(f"Invalid currency code {code!r}")
+    return code.strip().upper()
+
+
+class RateTable:
+    """Dated exchange rates into a base currency, per currency"""
+    __slots__ = ('base', '_series')
+
+    def __init__(self, base, days, currencies, rates):
+        import numpy as np
+
+        self.base = normalize_currency(base)
+        days = np.asarray(days, dtype=np.int64)
+        currencies = np.array([normalize_currency(code) for code in currencies], dtype=object)
+        rates = np.asarray(rates, dtype=float)
+        if not np.isfinite(rates).all() or (rates <= 0).any():
+            raise ValueError("Exchange rates must be positive numbers")
+
+        self._series = {}
+        for currency in sorted(set(currencies) - {self.base}):
+            rows = currencies == currency
+            currency_days, currency_rates = days[rows], rates[rows]
+            order = np.argsort(currency_days, kind='stable')
+            currency_days, currency_rates = currency_days[order], currency_rates[order]
+            # When a date is listed twice, the later row wins
+            last = np.append(currency_days[1:] != currency_days[:-1], True)
+            self._series[currency] = (currency_days[last], currency_rates[last])
+
+    @classmethod
+    def from_csv(cls, file, base=DEFAULT_BASE_CURRENCY):
+        """Read a date,currency,rate CSV (dates as YYYY-MM-DD)"""
+        import numpy as np
+        import pandas as pd
+
+        df = pd.read_csv(file)
+        missing = [column for column in RATE_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"Exchange rate file is missing columns: {', '.join(missing)}")
+        df = df.dropna(subset=RATE_COLUMNS)
+        days = pd.to_datetime(df['date'].astype(str).str[:10], format="%Y-%m-%d").to_numpy(dtype='datetime64[D]')
+        return cls(base, days.astype(np.int64), df['currency'].astype(str), df['rate'].astype(float))
+
+    def __len__(self):
+        return sum(len(days) for days, _ in self._series.values())
+
+    def currencies(self):
+        """Currencies with rates, not counting the base"""
+        return list(self._series)
+
+    def rates_at(self, currency, days):
+        """The rate in force on each day; days before the first rate use the first rate"""
+        import numpy as np
+
+        series = self._series.get(currency)
+        if series is None:
+            raise ValueError(f"No exchange rates for {currency}")
+        rate_days, rates = series
+        return rates[np.maximum(np.searchsorted(rate_days, days, side='right') - 1, 0)]
+
+    def convert(self, currencies, days, cents):
+        """Base-currency cents of each amount, rounded to the nearest cent
+
+        Rows in the base currency (or with no currency) are returned unchanged.
+        """
+        import numpy as np
+
+        currencies = np.asarray(currencies, dtype=object)
+        days = np.asarray(days, dtype=np.int64)
+        converted = np.array(cents, dtype=np.int64)
+        for currency in set(currencies.tolist()) - {'', self.base}:
+            rows = currencies == currency
+            converted[rows] = np.rint(converted[rows] * self.rates_at(currency, days[rows]))
+        return converted
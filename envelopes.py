@@ -0,0 +1,118 @@
+"""Envelope (rollover) budgeting: carrying unspent or overspent budget forward.
+
+For each category with rollover on, EnvelopeLedger keeps the cumulative
+spending through every period of the category's own frequency: budget
+months, Monday-aligned weeks or pay periods. A category's balance over any
+run of periods is then two lookups:
+
+    available(p) = budget * (p - start + 1) - (spent through p - spent through start - 1)
+
+so the amount carried into this month is O(1) however much history there
+is. Recording or deleting a transaction adds its amount to the cumulative
+entries from its period on, which is O(1) for the current period and
+O(periods since) for a back-dated one.
+
+Budgets aren't versioned, so the current budget applies to every period
+since the start.
+"""
+from budget_periods import MINUTES_PER_DAY, week_ordinal
+
+MONTHS = "budget_month"
+WEEKS = "week"
+PAY_PERIODS = "pay_period"
+
+
+def transaction_period(transaction, kind):
+    """The transaction's period ordinal of the given kind"""
+    if kind == WEEKS:
+        return week_ordinal(transaction.day)
+    return getattr(transaction, kind)
+
+
+class EnvelopeLedger:
+    """Cumulative spending per period for each rollover category"""
+    __slots__ = ('transactions', 'kinds', '_first', '_cumulative')
+
+    def __init__(self, transactions, kinds):
+        import numpy as np
+
+        # Same list as st.session_state.expenses, kept to detect when it is replaced
+        self.transactions = transactions
+        # Period kind per tracked category code
+        self.kinds = dict(kinds)
+        self._first = {}
+        self._cumulative = {}
+        if not self.kinds or not transactions:
+            return
+
+        total = len(transactions)
+        codes = np.fromiter((transaction.category_code for transaction in transactions), dtype=np.int64, count=total)
+        amounts = np.fromiter((transaction.amount_cents for transaction in transactions), dtype=np.int64, count=total)
+        periods = {}
+        for kind in set(self.kinds.values()):
+            if kind == WEEKS:
+                days = np.fromiter((transaction.timestamp for transaction in transactions), dtype=np.int64,
+                                   count=total) // MINUTES_PER_DAY
+                periods[kind] = week_ordinal(days)
+            else:
+                periods[kind] = np.fromiter((getattr(transaction, kind) for transaction in transactions),
+                                            dtype=np.int64, count=total)
+
+        for code, kind in self.kinds.items():
+            rows = codes == code
+            if not rows.any():
+                continue
+            category_periods = periods[kind][rows]
+            first = int(category_periods.min())
+            # Weights are summed as floats by bincount, which is exact for cents below 2**53
+            spent = np.bincount(category_periods - first, weights=amounts[rows]).astype(np.int64)
+            self._first[code] = first
+            self._cumulative[code] = np.cumsum(spent)
+
+    def _update(self, transaction, amount):
+        """Add amount to the cumulative spending from the transaction's period on"""
+        import numpy as np
+
+        code = transaction.category_code
+        kind = self.kinds.get(code)
+        if kind is None:
+            return
+        period = transaction_period(transaction, kind)
+        cumulative = self._cumulative.get(code)
+        if cumulative is None:
+            self._first[code] = period
+            cumulative = np.zeros(1, dtype=np.int64)
+        first = self._first[code]
+        if period < first:
+            cumulative = np.concatenate([np.zeros(first - period, dtype=np.int64), cumulative])
+            first = self._first[code] = period
+        elif period - first >= len(cumulative):
+            cumulative = np.concatenate([cumulative, np.full(period - first - len(cumulative) + 1, cumulative[-1])])
+        cumulative[period - first:] += amount
+        self._cumulative[code] = cumulative
+
+    def add(self, transaction):
+        """Count a newly recorded transaction"""
+        self._update(transaction, transaction.amount_cents)
+
+    def remove(self, transaction):
+        """Stop counting a deleted transaction"""
+        self._update(transaction, -transaction.amount_cents)
+
+    def spent_through(self, code, period):
+        """Spending in the category from its first period through period"""
+        cumulative = self._cumulative.get(code)
+        if cumulative is None or period < self._first[code]:
+            return 0
+        return int(cumulative[min(period - self._first[code], len(cumulative) - 1)])
+
+    def available(self, code, budget_cents, start_period, period):
+        """Budget left in period, including everything carried from start_period on"""
+        if period < start_period:
+            return 0
+        spent = self.spent_through(code, period) - self.spent_through(code, start_period - 1)
+        return budget_cents * (period - start_period + 1) - spent
+
+    def carried_in(self, code, budget_cents, start_period, period):
+        """Unspent (or, if negative, overspent) budget brought into period"""
+        return self.available(code, budget_cents, start_period, period - 1)
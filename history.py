@@ -0,0 +1,71 @@
+"""Undo/redo history of user changes.
+
+Each change is a Command carrying both directions: apply makes the change
+and revert makes its inverse. A command holds only the records it touches
+(the transactions added or deleted, a category's settings before and after,
+a goal), so undoing is as cheap as the change itself and nothing snapshots
+the whole session. Both stacks are bounded deques, so the history never
+holds more than HISTORY_LIMIT commands each way.
+
+Running a new command clears the redo stack, as in any editor.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+HISTORY_LIMIT = 50
+
+
+@dataclass(slots=True)
+class Command:
+    """A reversible change, described for the Undo/Redo buttons"""
+    label: str
+    apply: Callable
+    revert: Callable
+
+
+class CommandLog:
+    """Bounded undo and redo stacks of Commands"""
+    __slots__ = ('_undo', '_redo')
+
+    def __init__(self, limit=HISTORY_LIMIT):
+        self._undo = deque(maxlen=limit)
+        self._redo = deque(maxlen=limit)
+
+    def run(self, command):
+        """Apply a new command and make it the next one to undo; returns what apply returned"""
+        result = command.apply()
+        self._undo.append(command)
+        self._redo.clear()
+        return result
+
+    def undo(self):
+        """Revert the latest command, or return None if there is nothing to undo"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.revert()
+        self._redo.append(command)
+        return command
+
+    def redo(self):
+        """Re-apply the latest undone command, or return None if there is nothing to redo"""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.apply()
+        self._undo.append(command)
+        return command
+
+    def next_undo(self):
+        """Label of the command undo would revert, or None"""
+        return self._undo[-1].label if self._undo else None
+
+    def next_redo(self):
+        """Label of the command redo would re-apply, or None"""
+        return self._redo[-1].label if self._redo else None
+
+    def clear(self):
+        """Forget every command, e.g. when a different ledger is loaded"""
+        self._undo.clear()
+        self._redo.clear()
@@ -0,0 +1,195 @@
+"""Opt-in per-rerun timings for computation helpers and dashboard sections.
+
+Enable it from the sidebar checkbox or by starting the app with
+BUDGET_TRACKER_INSTRUMENTATION=1. Each rerun's wall time, call counts and
+rows scanned are shown in a collapsible panel and appended as one JSON line
+to a rotating log (BUDGET_TRACKER_TIMING_LOG, default budget_tracker_timings.log).
+
+For finer detail, capture_profile runs a single rerun under cProfile and
+keeps the top functions plus the raw profile for download.
+"""
+import cProfile
+import functools
+import json
+import logging
+import marshal
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import streamlit as st
+
+ENABLE_ENV = "BUDGET_TRACKER_INSTRUMENTATION"
+LOG_PATH_ENV = "BUDGET_TRACKER_TIMING_LOG"
+DEFAULT_LOG_PATH = "budget_tracker_timings.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 3
+
+_logger = None
+
+
+def enabled_by_default():
+    """Whether instrumentation starts switched on for new sessions"""
+    return os.environ.get(ENABLE_ENV, "") not in ("", "0")
+
+
+def is_enabled():
+    """Whether this session has instrumentation switched on"""
+    return st.session_state.get('instrumentation_enabled', enabled_by_default())
+
+
+def _rerun_timings():
+    """Timings collected so far in this rerun, or None when disabled"""
+    return st.session_state.get('_rerun_timings')
+
+
+def begin_rerun():
+    """Start collecting timings for the current rerun"""
+    st.session_state._rerun_timings = {} if is_enabled() else None
+    st.session_state._rerun_started = time.perf_counter()
+
+
+@contextmanager
+def timed_section(name, rows=None):
+    """Time a block; rows is an optional callable returning rows scanned"""
+    timings = _rerun_timings()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry = timings.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0})
+        entry['calls'] += 1
+        entry['seconds'] += time.perf_counter() - start
+        if rows is not None:
+            entry['rows'] += rows()
+
+
+def instrumented(name=None, rows=None):
+    """Decorator form of timed_section, named after the function by default"""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _rerun_timings() is None:
+                return func(*args, **kwargs)
+            with timed_section(label, rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _get_logger():
+    """Rotating JSON-lines logger for offline analysis, created on first use"""
+    global _logger
+    if _logger is None:
+        _logger = logging.getLogger("budget_tracker.timings")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = RotatingFileHandler(
+            os.environ.get(LOG_PATH_ENV, DEFAULT_LOG_PATH),
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    return _logger
+
+
+def end_rerun():
+    """Finish the rerun: log its timings and show the debug panel"""
+    timings = _rerun_timings()
+    if timings is None:
+        return
+
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'total_ms': round((time.perf_counter() - st.session_state._rerun_started) * 1000, 3),
+        'timings': {
+            name: {'calls': entry['calls'], 'ms': round(entry['seconds'] * 1000, 3), 'rows': entry['rows']}
+            for name, entry in timings.items()
+        },
+    }
+    _get_logger().info(json.dumps(record))
+    display_timing_panel(record)
+
+
+def display_timing_panel(record):
+    """Collapsible table of where this rerun spent its time"""
+    with st.expander(f"🐞 Rerun Timings ({record['total_ms']:.1f} ms)", expanded=False):
+        rows = [
+            {'Section': name, 'Time (ms)': entry['ms'], 'Calls': entry['calls'], 'Rows Scanned': entry['rows']}
+            for name, entry in sorted(record['timings'].items(), key=lambda item: item[1]['ms'], reverse=True)
+        ]
+        if rows:
+            st.table(rows)
+        else:
+            st.write("No instrumented code ran in this rerun.")
+        st.caption("Sections nest (e.g. trends run inside budget progress), so times overlap.")
+
+
+PROFILE_TOP_FUNCTIONS = 25
+
+
+def capture_profile(func):
+    """Run func under cProfile and keep the result for display_profile_panel"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        # Also runs when func ends the rerun early via st.rerun()
+        profiler.disable()
+        st.session_state.last_profile = summarize_profile(profiler)
+
+
+def summarize_profile(profiler):
+    """Top functions by cumulative time plus the raw pstats data"""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, calls, own_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'Function': f"{function} ({os.path.basename(filename)}:{line})",
+            'Calls': calls,
+            'Own (ms)': round(own_time * 1000, 3),
+            'Cumulative (ms)': round(cumulative_time * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['Cumulative (ms)'], reverse=True)
+    return {
+        'captured_at': datetime.now().strftime('%Y%m%d_%H%M%S'),
+        'total_ms': round(stats.total_tt * 1000, 3),
+        'top_functions': rows[:PROFILE_TOP_FUNCTIONS],
+        # Same format as Profile.dump_stats, so pstats/snakeviz can open it
+        'raw': marshal.dumps(stats.stats),
+    }
+
+
+def display_profile_panel():
+    """Show the last captured profile with a download of the raw data"""
+    profile = st.session_state.get('last_profile')
+    if not profile:
+        return
+
+    with st.expander(f"🔬 Rerun Profile ({profile['total_ms']:.1f} ms)", expanded=True):
+        st.table(profile['top_functions'])
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="💾 Download Raw Profile",
+                data=profile['raw'],
+                file_name=f"budget_tracker_rerun_{profile['captured_at']}.prof",
+                mime="application/octet-stream",
+                help="Open with `python -m pstats` or snakeviz",
+            )
+        with col2:
+            if st.button("🗑️ Discard Profile"):
+                del st.session_state.last_profile
+                st.rerun()
@@ -0,0 +1,45 @@
+"""Fixed-point money: every amount is stored as an integer number of cents.
+
+Integer sums are exact and independent of summation order, so two code paths
+totalling the same rows always agree to the cent. Amounts only become floats
+at the display edge (dollars) and are persisted as exact decimal text
+(format_cents), which keeps the CSV format readable and backwards compatible.
+"""
+import math
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENTS_PER_DOLLAR = 100
+
+
+def to_cents(value):
+    """Convert a dollar amount (number or decimal text) to integer cents"""
+    if isinstance(value, bool):
+        raise TypeError("Amount must be a number, got bool")
+    if isinstance(value, int):
+        return value * CENTS_PER_DOLLAR
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Amount must be finite, got {value}")
+        # Any 2-decimal value below ~9e13 dollars rounds back to its exact cents
+        return round(value * CENTS_PER_DOLLAR)
+    if isinstance(value, str):
+        try:
+            cents = Decimal(value.strip()).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount {value!r}") from None
+        if not cents.is_finite():
+            raise ValueError(f"Amount must be finite, got {value!r}")
+        return int(cents)
+    raise TypeError(f"Amount must be a number, got {type(value).__name__}")
+
+
+def dollars(cents):
+    """Float dollars for display and charts; never store the result"""
+    return cents / CENTS_PER_DOLLAR
+
+
+def format_cents(cents):
+    """Exact decimal text for persistence, e.g. -1234 -> '-12.34'"""
+    sign = '-' if cents < 0 else ''
+    whole, fraction = divmod(abs(cents), CENTS_PER_DOLLAR)
+    return f"{sign}{whole}.{fraction:02d}"
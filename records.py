@@ -0,0 +1,234 @@
+"""Compact, validated record types for transactions and savings goals.
+
+Rows are slotted dataclasses rather than dicts: no per-row __dict__, the
+timestamp is one integer (minutes since 1970-01-01) instead of a date string,
+the category is an integer code from a CategoryDictionary, amounts are integer
+cents (see money.py), and repeated strings such as frequency are interned. Invalid
+values raise ValueError/TypeError at construction, so bad rows are rejected
+when they are inserted or imported rather than when a chart trips over them.
+
+A purchase split across categories is stored as one row per category
+allocation, all sharing a split_id. Every per-category total, chart and
+model then counts the allocations without a special case; only the
+transaction list groups them back into one purchase.
+"""
+import sys
+from dataclasses import dataclass, field
+
+from budget_periods import MINUTES_PER_DAY, format_timestamp, parse_timestamp
+from money import dollars, format_cents
+
+TRANSACTION_COLUMNS = ['date', 'category', 'amount', 'description', 'frequency', 'currency', 'original_amount',
+                       'split_id']
+SAVINGS_GOAL_COLUMNS = ['id', 'name', 'target_amount', 'current_amount', 'description', 'created_date', 'completed',
+                        'priority']
+# Contributions reuse the goal id and the transaction date/amount columns
+GOAL_CONTRIBUTION_COLUMNS = ['id', 'date', 'amount']
+
+
+def _require_text(value, field_name, allow_empty=True):
+    if not isinstance(value, str):
+        raise TypeError(f"{field_name} must be text, got {type(value).__name__}")
+    if not allow_empty and not value.strip():
+        raise ValueError(f"{field_name} is required")
+    return sys.intern(value)
+
+
+def _require_cents(value, field_name):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"{field_name} must be integer cents, got {type(value).__name__}")
+    return value
+
+
+@dataclass(slots=True)
+class Transaction:
+    """A ledger row; amount_cents is positive for spending and negative for income"""
+    timestamp: int
+    # Code in the session's CategoryDictionary (see categories.py)
+    category_code: int
+    amount_cents: int
+    description: str = ''
+    frequency: str = 'Monthly'
+    # Derived from the timestamp and the monthly reset day / pay schedule (see stamp_budget_period)
+    budget_month: int = 0
+    pay_period: int = 0
+    # For foreign-currency rows: the amount as made, in that currency; amount_cents
+    # is then its base-currency value (see currencies.py). '' means the base currency.
+    currency: str = ''
+    original_cents: int = 0
+    # Rows entered together as one split purchase share a split id; 0 if not split
+    split_id: int = 0
+
+    # +1: amounts must be >= 0, -1: amounts must be <= 0, 0: either
+    AMOUNT_SIGN = 0
+
+    def __post_init__(self):
+        if isinstance(self.timestamp, bool) or not isinstance(self.timestamp, int):
+            raise TypeError(f"timestamp must be an integer, got {type(self.timestamp).__name__}")
+        if isinstance(self.category_code, bool) or not isinstance(self.category_code, int):
+            raise TypeError(f"category_code must be an integer, got {type(self.category_code).__name__}")
+        if self.category_code < 0:
+            raise ValueError(f"Invalid category code {self.category_code}")
+        self.amount_cents = _require_cents(self.amount_cents, "amount_cents")
+        self.description = _require_text(self.description, "description")
+        self.frequency = _require_text(self.frequency, "frequency", allow_empty=False)
+        self.currency = _require_text(self.currency, "currency")
+        self.original_cents = _require_cents(self.original_cents, "original_cents")
+        if isinstance(self.split_id, bool) or not isinstance(self.split_id, int):
+            raise TypeError(f"split_id must be an integer, got {type(self.split_id).__name__}")
+        if self.split_id < 0:
+            raise ValueError(f"Invalid split id {self.split_id}")
+        if self.amount_cents * self.AMOUNT_SIGN < 0:
+            raise ValueError(f"{type(self).__name__} amount has the wrong sign: {self.amount_cents}")
+
+    @classmethod
+    def from_date(cls, date_text, category_code, amount_cents, description='', frequency='Monthly',
+                  currency='', original_cents=0, split_id=0):
+        """Build a record from a 'YYYY-MM-DD HH:MM' date string"""
+        return cls(parse_timestamp(date_text), category_code, amount_cents, description, frequency,
+                   currency=currency, original_cents=original_cents, split_id=split_id)
+
+    @property
+    def date(self):
+        return format_timestamp(self.timestamp)
+
+    @property
+    def day(self):
+        return self.timestamp // MINUTES_PER_DAY
+
+    @property
+    def amount(self):
+        """Amount in dollars, for display"""
+        return dollars(self.amount_cents)
+
+    @property
+    def is_income(self):
+        return self.amount_cents < 0
+
+    def to_row(self, categories):
+        """The persisted (CSV) representation, with the category code resolved to its name"""
+        return {
+            'date': self.date,
+            'category': categories.name(self.category_code),
+            'amount': format_cents(self.amount_cents),
+            'description': self.description,
+            'frequency': self.frequency,
+            'currency': self.currency,
+            'original_amount': format_cents(self.original_cents) if self.currency else '',
+            'split_id': self.split_id or '',
+        }
+
+
+@dataclass(slots=True)
+class Expense(Transaction):
+    """Money spent in a budget category (or 'Other (No Budget)')"""
+    AMOUNT_SIGN = 1
+
+
+@dataclass(slots=True)
+class IncomeRecord(Transaction):
+    """An income payment, stored with a negative amount like the CSV format"""
+    AMOUNT_SIGN = -1
+
+
+def transaction_from_row(categories, date_text, category, amount_cents, description='', frequency='Monthly',
+                         currency='', original_cents=0, split_id=0):
+    """Build an Expense or IncomeRecord from persisted fields, by the amount's sign"""
+    record_type = IncomeRecord if amount_cents < 0 else Expense
+    return record_type.from_date(date_text, categories.code(category), amount_cents, description, frequency,
+                                 currency, original_cents, split_id)
+
+
+@dataclass(slots=True)
+class GoalContribution:
+    """Money put into a savings goal; negative for a withdrawal"""
+    timestamp: int
+    amount_cents: int
+
+    def __post_init__(self):
+        if isinstance(self.timestamp, bool) or not isinstance(self.timestamp, int):
+            raise TypeError(f"timestamp must be an integer, got {type(self.timestamp).__name__}")
+        self.amount_cents = _require_cents(self.amount_cents, "amount_cents")
+
+    def to_row(self, goal_id):
+        """The persisted (CSV) representation"""
+        return {'id': goal_id, 'date': format_timestamp(self.timestamp), 'amount': format_cents(self.amount_cents)}
+
+
+@dataclass(slots=True)
+class SavingsGoal:
+    """A savings target and how much has been put towards it
+
+    current_cents is the amount the goal started with plus every contribution;
+    contributions are appended in time order and never rewritten, only taken
+    back from the end when a change is undone.
+    """
+    id: int
+    name: str
+    target_cents: int
+    current_cents: int = 0
+    description: str = ''
+    created_date: str = ''
+    completed: bool = False
+    # Lower numbers are funded first when a surplus is allocated
+    priority: int = 0
+    contributions: list = field(default_factory=list)
+
+    def __post_init__(self):
+        if isinstance(self.id, bool) or not isinstance(self.id, int):
+            raise TypeError(f"id must be an integer, got {type(self.id).__name__}")
+        self.name = _require_text(self.name, "name", allow_empty=False).strip()
+        self.target_cents = _require_cents(self.target_cents, "target_cents")
+        self.current_cents = _require_cents(self.current_cents, "current_cents")
+        self.description = _require_text(self.description, "description")
+        self.created_date = _require_text(self.created_date, "created_date")
+        self.completed = bool(self.completed)
+        if self.target_cents <= 0:
+            raise ValueError("target amount must be greater than zero")
+        if self.current_cents < 0:
+            raise ValueError("current amount can't be negative")
+        if isinstance(self.priority, bool) or not isinstance(self.priority, int):
+            raise TypeError(f"priority must be an integer, got {type(self.priority).__name__}")
+
+    @property
+    def target_amount(self):
+        """Target in dollars, for display"""
+        return dollars(self.target_cents)
+
+    @property
+    def current_amount(self):
+        """Amount saved so far in dollars, for display"""
+        return dollars(self.current_cents)
+
+    def add_contribution(self, contribution):
+        """Append a contribution record and update the amount saved"""
+        if self.current_cents + contribution.amount_cents < 0:
+            raise ValueError("can't withdraw more than has been saved")
+        self.contributions.append(contribution)
+        self.current_cents += contribution.amount_cents
+        return contribution
+
+    def remove_last_contribution(self, contribution):
+        """Take back the latest contribution (to undo it); it must be the one passed"""
+        if not self.contributions or self.contributions[-1] is not contribution:
+            raise ValueError("only the latest contribution can be removed")
+        self.contributions.pop()
+        self.current_cents -= contribution.amount_cents
+
+    @property
+    def progress(self):
+        """Fraction of the target saved, capped at 1"""
+        return min(self.current_cents / self.target_cents, 1.0)
+
+    def to_row(self):
+        """The persisted (CSV) representation"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'target_amount': format_cents(self.target_cents),
+            'current_amount': format_cents(self.current_cents),
+            'description': self.description,
+            'created_date': self.created_date,
+            'completed': self.completed,
+            'priority': self.priority,
+        }
@@ -0,0 +1,67 @@
+"""Spending comparison reports from a category x budget-month matrix.
+
+CategoryMonthMatrix sums spending once per category code and budget month
+and keeps the cumulative sum along the months, so the spending of any run
+of months is one subtraction per category. Every report is then a pair of
+month ranges, and comparing them is a slice-and-diff of the same matrix.
+
+Quarters are runs of three budget months starting at a month ordinal that
+is divisible by 3 (January, April, July and October).
+"""
+from budget_periods import month_display_name
+
+YEAR_OVER_YEAR = "This month vs same month last year"
+TRAILING_YEAR = "Trailing 12 months vs the 12 before"
+QUARTER_OVER_QUARTER = "This quarter vs last quarter"
+REPORTS = [YEAR_OVER_YEAR, TRAILING_YEAR, QUARTER_OVER_QUARTER]
+
+
+class CategoryMonthMatrix:
+    """Cumulative spending (cents) per category code over budget months"""
+    __slots__ = ('first_month', 'cumulative')
+
+    def __init__(self, transactions, category_count, last_month):
+        import numpy as np
+
+        total = len(transactions)
+        months = np.fromiter((transaction.budget_month for transaction in transactions), dtype=np.int64, count=total)
+        codes = np.fromiter((transaction.category_code for transaction in transactions), dtype=np.int64, count=total)
+        amounts = np.fromiter((transaction.amount_cents for transaction in transactions), dtype=np.int64, count=total)
+        spending = amounts > 0
+        months, codes, amounts = months[spending], codes[spending], amounts[spending]
+
+        self.first_month = int(months.min()) if len(months) else last_month
+        month_count = max(last_month, int(months.max()) if len(months) else last_month) - self.first_month + 1
+        spend = np.bincount(codes * month_count + (months - self.first_month), weights=amounts,
+                            minlength=category_count * month_count).astype(np.int64).reshape(category_count, month_count)
+        self.cumulative = np.zeros((category_count, month_count + 1), dtype=np.int64)
+        np.cumsum(spend, axis=1, out=self.cumulative[:, 1:])
+
+    def totals(self, first_month, last_month):
+        """Spending per category code from first_month through last_month"""
+        month_count = self.cumulative.shape[1] - 1
+        hi = min(max(last_month - self.first_month + 1, 0), month_count)
+        lo = min(max(first_month - self.first_month, 0), hi)
+        return self.cumulative[:, hi] - self.cumulative[:, lo]
+
+
+def quarter_label(month):
+    """e.g. 'Q3 2026' for any month ordinal in that quarter"""
+    return f"Q{month % 12 // 3 + 1} {month // 12}"
+
+
+def comparison_ranges(report, current_month):
+    """((first, last) current months, (first, last) previous months, current label, previous label)"""
+    if report == YEAR_OVER_YEAR:
+        return ((current_month, current_month), (current_month - 12, current_month - 12),
+                month_display_name(current_month), month_display_name(current_month - 12))
+    if report == TRAILING_YEAR:
+        return ((current_month - 11, current_month), (current_month - 23, current_month - 12),
+                "Last 12 Months", "12 Months Before")
+    if report == QUARTER_OVER_QUARTER:
+        # The current quarter is partial, so compare it with the same months of the last one
+        quarter = current_month - current_month % 3
+        elapsed = current_month - quarter
+        return ((quarter, current_month), (quarter - 3, quarter - 3 + elapsed),
+                f"{quarter_label(quarter)} to date", f"{quarter_label(quarter - 3)} same months")
+    raise ValueError(f"Unknown report {report!r}")
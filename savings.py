@@ -0,0 +1,154 @@
+"""Savings goal projections from contribution history.
+
+A goal's pace is the net amount contributed over the trailing
+RATE_WINDOW_DAYS, divided by the days of that window the goal existed for,
+so a goal created last week isn't diluted by a 90-day denominator. The
+completion forecast is the remaining amount divided by that pace.
+
+A monthly surplus is allocated to goals in priority order: each goal takes
+what it still needs until the surplus runs out. Over the months that
+follow, the surplus keeps cascading down the list as goals complete, so a
+goal is reached once the surplus has covered its own remaining amount and
+everything ahead of it. Every goal is handled at once with numpy (a
+cumulative sum over the remaining amounts) rather than a loop over goals.
+
+Goals live in a GoalMap keyed by id. Ids come from a counter that only
+grows (and is exported with the goals), so deleting a goal never lets a new
+one reuse its id, and lookups, updates and deletes don't depend on a goal's
+position in a list.
+"""
+from budget_periods import MINUTES_PER_DAY, day_ordinal
+
+RATE_WINDOW_DAYS = 90
+DAYS_PER_MONTH = 30.44
+
+
+class GoalMap:
+    """Savings goals by id, iterated in the order they were added"""
+    __slots__ = ('_goals', 'next_id')
+
+    def __init__(self, goals=(), next_id=0):
+        self._goals = {}
+        # Never decreases, so an id is never handed out twice
+        self.next_id = next_id
+        for goal in goals:
+            self.add(goal)
+
+    def __len__(self):
+        return len(self._goals)
+
+    def __iter__(self):
+        return iter(self._goals.values())
+
+    def __contains__(self, goal_id):
+        return goal_id in self._goals
+
+    def __getitem__(self, goal_id):
+        return self._goals[goal_id]
+
+    def get(self, goal_id):
+        """The goal with this id, or None"""
+        return self._goals.get(goal_id)
+
+    def new_id(self):
+        """Reserve the next unused id"""
+        goal_id = self.next_id
+        self.next_id += 1
+        return goal_id
+
+    def add(self, goal):
+        """Store a goal under its id, which must not be taken"""
+        if goal.id in self._goals:
+            raise ValueError(f"Savings goal id {goal.id} is already in use")
+        self._goals[goal.id] = goal
+        self.next_id = max(self.next_id, goal.id + 1)
+        return goal
+
+    def remove(self, goal_id):
+        """Delete and return the goal with this id"""
+        return self._goals.pop(goal_id)
+
+
+def _goal_start_days(goals, today):
+    """Day ordinal each goal was created (today if the date is missing)"""
+    import numpy as np
+
+    return np.fromiter((day_ordinal(goal.created_date) if goal.created_date else today for goal in goals),
+                       dtype=np.int64, count=len(goals))
+
+
+def contribution_rates(goals, today, window_days=RATE_WINDOW_DAYS):
+    """Net cents per day contributed to each goal over the trailing window, as an array"""
+    import numpy as np
+
+    counts = [len(goal.contributions) for goal in goals]
+    total = sum(counts)
+    owners = np.repeat(np.arange(len(goals)), counts)
+    days = np.fromiter((contribution.timestamp for goal in goals for contribution in goal.contributions),
+                       dtype=np.int64, count=total) // MINUTES_PER_DAY
+    amounts = np.fromiter((contribution.amount_cents for goal in goals for contribution in goal.contributions),
+                          dtype=np.int64, count=total)
+
+    window_start = today - window_days + 1
+    recent = (days >= window_start) & (days <= today)
+    contributed = np.bincount(owners[recent], weights=amounts[recent], minlength=len(goals))
+    # Days of the window each goal existed for, counting today
+    existed = today - np.maximum(_goal_start_days(goals, today), window_start) + 1
+    return contributed / np.clip(existed, 1, window_days)
+
+
+def remaining_cents(goals):
+    """Cents still needed by each goal (0 once reached), as an array"""
+    import numpy as np
+
+    return np.fromiter((max(goal.target_cents - goal.current_cents, 0) for goal in goals),
+                       dtype=np.int64, count=len(goals))
+
+
+def days_to_complete(remaining, cents_per_day):
+    """Days until each goal is reached at its pace: 0 if reached, inf if the pace isn't positive"""
+    import numpy as np
+
+    remaining = np.asarray(remaining, dtype=float)
+    days = np.full(len(remaining), np.inf)
+    moving = np.asarray(cents_per_day) > 0
+    days[moving] = np.ceil(remaining[moving] / np.asarray(cents_per_day)[moving])
+    days[remaining <= 0] = 0
+    return days
+
+
+def _priority_order(goals):
+    """Goal positions in funding order: by priority, ties by id"""
+    import numpy as np
+
+    return np.lexsort((
+        np.fromiter((goal.id for goal in goals), dtype=np.int64, count=len(goals)),
+        np.fromiter((goal.priority for goal in goals), dtype=np.int64, count=len(goals)),
+    ))
+
+
+def allocate_surplus(goals, surplus_cents):
+    """Cents of one month's surplus each goal gets when funded in priority order"""
+    import numpy as np
+
+    remaining = remaining_cents(goals)
+    order = _priority_order(goals)
+    # Everything needed by higher-priority goals comes out of the surplus first
+    needed_before = np.cumsum(remaining[order]) - remaining[order]
+    allocation = np.zeros(len(goals), dtype=np.int64)
+    allocation[order] = np.clip(max(surplus_cents, 0) - needed_before, 0, remaining[order])
+    return allocation
+
+
+def days_to_complete_with_surplus(goals, surplus_cents):
+    """Days until each goal is reached when a monthly surplus cascades down the priorities"""
+    import numpy as np
+
+    remaining = remaining_cents(goals)
+    order = _priority_order(goals)
+    # A goal is done once the surplus has covered it and every goal ahead of it
+    needed_through = np.zeros(len(goals), dtype=np.int64)
+    needed_through[order] = np.cumsum(remaining[order])
+    days = days_to_complete(needed_through, np.full(len(goals), max(surplus_cents, 0) / DAYS_PER_MONTH))
+    days[remaining <= 0] = 0
+    return days
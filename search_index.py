@@ -0,0 +1,148 @@
+"""Inverted index for searching transactions by description and category.
+
+Each description word maps to the set of transactions containing it, and a
+sorted vocabulary makes prefix matching a bisect rather than a scan of every
+word. Categories are indexed by code, not name, so a category rename needs
+no reindexing: query words are matched against the current names in the
+CategoryDictionary at search time. Transactions are referenced by id(),
+since the records themselves are unhashable dataclasses.
+
+Filters without query words are range slices: the transaction list is kept
+in timestamp order by the BalanceLedger, so a date range is a bisect of it,
+and a secondary list of (absolute cents, id) pairs kept sorted makes an
+amount range a bisect too. Whichever slice is smaller is scanned.
+"""
+import re
+import sys
+from bisect import bisect_left, insort
+
+from balance_ledger import timestamp_bounds
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lower-cased words of a description or query"""
+    return _WORD.findall(text.lower())
+
+
+class TransactionIndex:
+    """Word and category postings over a list of transactions"""
+    __slots__ = ('transactions', '_rows', '_postings', '_vocabulary', '_by_category', '_by_amount')
+
+    def __init__(self, transactions):
+        # Same list as st.session_state.expenses, kept to detect when it is replaced
+        self.transactions = transactions
+        self._rows = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._by_category = {}
+        self._by_amount = []
+        for transaction in transactions:
+            self._index(transaction)
+        self._vocabulary = sorted(self._postings)
+        self._by_amount.sort()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _index(self, transaction):
+        """Add a transaction's postings, returning the words seen for the first time"""
+        row_id = id(transaction)
+        self._rows[row_id] = transaction
+        self._by_category.setdefault(transaction.category_code, set()).add(row_id)
+        self._by_amount.append((abs(transaction.amount_cents), row_id))
+        new_words = []
+        for word in set(tokenize(transaction.description)):
+            rows = self._postings.get(word)
+            if rows is None:
+                word = sys.intern(word)
+                rows = self._postings[word] = set()
+                new_words.append(word)
+            rows.add(row_id)
+        return new_words
+
+    def add(self, transaction):
+        """Index a transaction that was just recorded"""
+        for word in self._index(transaction):
+            insort(self._vocabulary, word)
+        # _index appended the amount key; move it into sorted position
+        insort(self._by_amount, self._by_amount.pop())
+
+    def remove(self, transaction):
+        """Drop a deleted transaction from every posting it is in"""
+        row_id = id(transaction)
+        if self._rows.pop(row_id, None) is None:
+            return
+        self._by_category.get(transaction.category_code, set()).discard(row_id)
+        amount_key = (abs(transaction.amount_cents), row_id)
+        position = bisect_left(self._by_amount, amount_key)
+        if position < len(self._by_amount) and self._by_amount[position] == amount_key:
+            del self._by_amount[position]
+        for word in set(tokenize(transaction.description)):
+            rows = self._postings.get(word)
+            if rows is not None:
+                rows.discard(row_id)
+                if not rows:
+                    del self._postings[word]
+                    del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def _prefix_matches(self, prefix):
+        """Rows with a description word starting with prefix"""
+        matches = set()
+        start = bisect_left(self._vocabulary, prefix)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(prefix):
+                break
+            matches |= self._postings[word]
+        return matches
+
+    def _category_matches(self, prefix, categories):
+        """Rows whose category name has a word starting with prefix"""
+        matches = set()
+        for code, rows in self._by_category.items():
+            if any(word.startswith(prefix) for word in tokenize(categories.name(code))):
+                matches |= rows
+        return matches
+
+    def _amount_bounds(self, min_cents, max_cents):
+        """(lo, hi) of the _by_amount entries within the inclusive cents range"""
+        lo = 0 if min_cents is None else bisect_left(self._by_amount, (min_cents,))
+        hi = len(self._by_amount) if max_cents is None else bisect_left(self._by_amount, (max_cents + 1,))
+        return lo, max(lo, hi)
+
+    def _range_candidates(self, start_timestamp, end_timestamp, min_cents, max_cents):
+        """The smaller of the date-range and amount-range slices"""
+        date_lo, date_hi = timestamp_bounds(self.transactions, start_timestamp, end_timestamp)
+        amount_lo, amount_hi = self._amount_bounds(min_cents, max_cents)
+        if amount_hi - amount_lo < date_hi - date_lo:
+            return [self._rows[row_id] for _, row_id in self._by_amount[amount_lo:amount_hi]]
+        return self.transactions[date_lo:date_hi]
+
+    def search(self, query, categories, start_timestamp=None, end_timestamp=None,
+               min_cents=None, max_cents=None):
+        """Transactions matching every query word (as a prefix) and the filters, newest first
+
+        Amount filters compare absolute cents, so income rows (stored negative)
+        match by their size like spending does.
+        """
+        row_ids = None
+        for prefix in tokenize(query):
+            matches = self._prefix_matches(prefix) | self._category_matches(prefix, categories)
+            row_ids = matches if row_ids is None else row_ids & matches
+            if not row_ids:
+                return []
+
+        if row_ids is None:
+            rows = self._range_candidates(start_timestamp, end_timestamp, min_cents, max_cents)
+        else:
+            rows = [self._rows[row_id] for row_id in row_ids]
+        results = [
+            transaction for transaction in rows
+            if (start_timestamp is None or transaction.timestamp >= start_timestamp)
+            and (end_timestamp is None or transaction.timestamp <= end_timestamp)
+            and (min_cents is None or abs(transaction.amount_cents) >= min_cents)
+            and (max_cents is None or abs(transaction.amount_cents) <= max_cents)
+        ]
+        results.sort(key=lambda transaction: transaction.timestamp, reverse=True)
+        return results
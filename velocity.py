@@ -0,0 +1,95 @@
+"""Spending velocity: the current period's spending against comparable past periods.
+
+Spending is bucketed once into a category x day array (DailySpend). The sum
+over any window of days is then a difference of two cumulative sums, so
+comparing against 52 past weeks costs the same handful of numpy operations
+as comparing against 4.
+
+Windows are either calendar periods (Monday-aligned weeks or pay periods),
+where the current partial period is compared with the same number of days
+at the start of each past one, or rolling 7-day windows ending today.
+Past windows with no spending count as zero. Only windows that end before
+the first recorded expense are left out, since there is no data for them; a
+window the first expense falls inside still counts.
+"""
+from budget_periods import MINUTES_PER_DAY
+
+CALENDAR = "calendar"
+ROLLING = "rolling"
+MIN_LOOKBACK = 4
+MAX_LOOKBACK = 52
+# Under exponential weighting, a period this many periods back counts half as much
+HALF_LIFE_PERIODS = 4
+
+
+class DailySpend:
+    """Spending (cents) per category code and day, from the first expense to last_day"""
+    __slots__ = ('first_day', 'spend')
+
+    def __init__(self, transactions, category_count, last_day):
+        import numpy as np
+
+        total = len(transactions)
+        days = np.fromiter((transaction.timestamp for transaction in transactions), dtype=np.int64,
+                           count=total) // MINUTES_PER_DAY
+        codes = np.fromiter((transaction.category_code for transaction in transactions), dtype=np.int64, count=total)
+        amounts = np.fromiter((transaction.amount_cents for transaction in transactions), dtype=np.int64, count=total)
+        spending = amounts > 0
+        days, codes, amounts = days[spending], codes[spending], amounts[spending]
+
+        self.first_day = int(days.min()) if len(days) else last_day
+        day_count = max(last_day, int(days.max()) if len(days) else last_day) - self.first_day + 1
+        # Weights are summed as floats by bincount, which is exact for cents below 2**53
+        self.spend = np.bincount(codes * day_count + (days - self.first_day), weights=amounts,
+                                 minlength=category_count * day_count).astype(np.int64).reshape(category_count, day_count)
+
+    def window_totals(self, starts, ends):
+        """Spending per category (rows) in each inclusive day window (columns)"""
+        import numpy as np
+
+        category_count, day_count = self.spend.shape
+        cumulative = np.zeros((category_count, day_count + 1), dtype=np.int64)
+        np.cumsum(self.spend, axis=1, out=cumulative[:, 1:])
+        lo = np.clip(np.asarray(starts) - self.first_day, 0, day_count)
+        hi = np.clip(np.asarray(ends) - self.first_day + 1, 0, day_count)
+        return cumulative[:, hi] - cumulative[:, np.minimum(lo, hi)]
+
+
+def comparison_windows(mode, today, lookback, period_start=None, current_period=None):
+    """(starts, ends) day ordinals: the current window first, then lookback past ones
+
+    In calendar mode, period_start(ordinal) gives the first day of a period and
+    current_period is the ordinal containing today.
+    """
+    import numpy as np
+
+    offsets = np.arange(lookback + 1)
+    if mode == ROLLING:
+        ends = today - 7 * offsets
+        return ends - 6, ends
+
+    # Start of the next period, then of the current one and each past one
+    boundaries = np.array([period_start(current_period - offset) for offset in range(-1, lookback + 1)])
+    starts = boundaries[1:]
+    # Past periods shorter than the elapsed stretch (e.g. February) stop at their own end
+    ends = np.minimum(starts + (today - starts[0]), boundaries[:-1] - 1)
+    return starts, ends
+
+
+def velocity(daily, starts, ends, exponential=False):
+    """Current spending, weighted past average and windows compared, overall and per category
+
+    Returns (current, average, compared): current and average are arrays
+    with one row per category plus a final overall row.
+    """
+    import numpy as np
+
+    totals = daily.window_totals(starts, ends)
+    totals = np.vstack([totals, totals.sum(axis=0)])
+    past = totals[:, 1:]
+    weights = 0.5 ** (np.arange(past.shape[1]) / HALF_LIFE_PERIODS) if exponential else np.ones(past.shape[1])
+    weights = weights * (np.asarray(ends[1:]) >= daily.first_day)
+    compared = int(np.count_nonzero(weights))
+    if not compared:
+        return totals[:, 0], np.zeros(len(totals)), 0
+    return totals[:, 0], past @ weights / weights.sum(), compared